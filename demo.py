@@ -32,19 +32,26 @@ def create_test_video():
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
     out = cv2.VideoWriter(output_path, fourcc, 20.0, (640, 480))
     
-    for i in range(100):  # 5 seconds at 20 fps
-        # Create a frame with moving shapes
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    # Precompute shape positions for all frames
+    num_frames = 100  # 5 seconds at 20 fps
+    t = np.arange(num_frames)
+    xs = (50 + 30 * np.sin(t * 0.1)).astype(int)
+    ys = (240 + 30 * np.cos(t * 0.1)).astype(int)
+    cxs = (400 + 50 * np.cos(t * 0.15)).astype(int)
+    cys = (240 + 50 * np.sin(t * 0.15)).astype(int)
+    
+    # Reuse a single frame buffer
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    
+    for i in range(num_frames):
+        frame.fill(0)
         
         # Draw moving rectangle
-        x = int(50 + 30 * np.sin(i * 0.1))
-        y = int(240 + 30 * np.cos(i * 0.1))
+        x, y = int(xs[i]), int(ys[i])
         cv2.rectangle(frame, (x, y), (x + 100, y + 100), (0, 255, 0), -1)
         
         # Draw moving circle
-        cx = int(400 + 50 * np.cos(i * 0.15))
-        cy = int(240 + 50 * np.sin(i * 0.15))
-        cv2.circle(frame, (cx, cy), 50, (255, 0, 0), -1)
+        cv2.circle(frame, (int(cxs[i]), int(cys[i])), 50, (255, 0, 0), -1)
         
         # Add text
         cv2.putText(frame, f"Frame {i}", (10, 30), 
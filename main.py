@@ -35,6 +35,17 @@ def main():
                        help='Confidence threshold for detections')
     parser.add_argument('--output', type=str, default=os.getenv('OUTPUT_DIR', './output'),
                        help='Output directory for saved detections')
+    parser.add_argument('--batch', type=int, default=int(os.getenv('BATCH_SIZE', '1')),
+                       help='Number of frames to batch per inference call (4-16 on GPU)')
+    parser.add_argument('--device', type=str, default=os.getenv('DEVICE'),
+                       help='Inference device (0, cuda:0 or cpu); defaults to the first GPU if available')
+    parser.add_argument('--half', dest='half', action='store_true', default=True,
+                       help='Use FP16 inference on GPU (default)')
+    parser.add_argument('--no-half', dest='half', action='store_false',
+                       help='Use FP32 inference')
+    parser.add_argument('--vid-stride', type=int, default=None,
+                       help='Process every Nth frame, dropping the rest without decoding '
+                            '(default: FRAME_SAMPLE_EVERY or 1)')
     parser.add_argument('--web', action='store_true', help='Launch web interface')
     
     args = parser.parse_args()
@@ -45,7 +56,11 @@ def main():
             source=args.source,
             model=args.model,
             confidence_threshold=args.confidence,
-            output_dir=args.output
+            output_dir=args.output,
+            batch_size=args.batch,
+            device=args.device,
+            half=args.half,
+            vid_stride=args.vid_stride
         )
         
         if args.web:
@@ -5,15 +5,128 @@ Handles different AI models and Roboflow integration
 
 import cv2
 import numpy as np
+import os
 import logging
-from typing import Dict, Any, Optional, Union
+import ast
+import asyncio
+import base64
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Union
 from pathlib import Path
 import json
 
+from utils.video_utils import get_turbojpeg
+
 try:
     from ultralytics import YOLO
+    from ultralytics.utils import ops as yolo_ops
 except ImportError:
     YOLO = None
+    yolo_ops = None
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# COCO class names in Darknet order, shipped next to this module
+COCO_CLASSES = tuple((Path(__file__).parent / "coco.names").read_text().splitlines())
+
+# Input size used by the COCO detectors (Darknet and TensorRT engine)
+COCO_INPUT_SIZE = 416
+
+# Input size used by the YOLOv8 PyTorch model
+YOLO_INPUT_SIZE = 640
+
+# YOLOv8 output stride and letterbox fill, matching Ultralytics' LetterBox
+YOLO_STRIDE = 32
+LETTERBOX_FILL = 114
+
+# IoU above which overlapping boxes of the same class are suppressed
+NMS_THRESHOLD = 0.4
+
+# Tesseract input is downscaled to at most this height
+OCR_MAX_HEIGHT = 480
+
+# LSTM engine, assume a uniform block of text
+OCR_CONFIG = '--oem 1 --psm 6'
+
+# JPEG settings for frames uploaded to Roboflow
+ROBOFLOW_JPEG_QUALITY = 80
+ROBOFLOW_JPEG_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, ROBOFLOW_JPEG_QUALITY, cv2.IMWRITE_JPEG_OPTIMIZE, 0]
+
+# Roboflow hosted inference API, and the connection pool predict_async keeps open to it
+ROBOFLOW_API_URL = "https://detect.roboflow.com"
+ROBOFLOW_CONNECTIONS = 8
+ROBOFLOW_KEEPALIVE = 30
+
+# Darknet YOLOv4 files as name -> url
+COCO_MODEL_FILES = {
+    "yolov4.cfg": "https://raw.githubusercontent.com/AlexeyAB/darknet/master/cfg/yolov4.cfg",
+    "yolov4.weights": ("https://github.com/AlexeyAB/darknet/releases/download/"
+                       "darknet_yolo_v3_optimal/yolov4.weights"),
+}
+
+# Model download settings
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+DOWNLOAD_RETRIES = 3
+
+# Frames used to calibrate INT8 quantization
+INT8_CALIBRATION_FRAMES = 300
+
+# Largest batch the TensorRT engine is built for
+MAX_BATCH_SIZE = 16
+
+def _cuda_available() -> bool:
+    """Check whether a CUDA device is usable by PyTorch"""
+    return torch is not None and torch.cuda.is_available()
+
+def _opencv_cuda_available() -> bool:
+    """Check whether OpenCV was built with CUDA and sees a device"""
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except (AttributeError, cv2.error):
+        return False
+
+OPENCV_CUDA = _opencv_cuda_available()
+
+# Models loaded without the Roboflow client; any other name (not an .onnx
+# path) is a Roboflow project
+LOCAL_MODELS = ("coco", "yolo", "ocr", "paddleocr", "int8")
+
+def is_roboflow_model(model_name: str) -> bool:
+    """Check whether a model name refers to a Roboflow project"""
+    name = model_name.lower()
+    return name not in LOCAL_MODELS and not name.endswith(".onnx")
+
+def _is_gpu_mat(frame) -> bool:
+    """Check whether a frame lives on the GPU as a cv2.cuda_GpuMat"""
+    return OPENCV_CUDA and isinstance(frame, cv2.cuda_GpuMat)
+
+def _frame_shape(frame) -> tuple:
+    """Get (height, width) of a numpy or GPU frame"""
+    if _is_gpu_mat(frame):
+        width, height = frame.size()
+        return height, width
+    return frame.shape[:2]
+
+# Loaded model state handed from the cached manager to each new one; scratch
+# buffers, CUDA streams and sessions are allocated per instance instead
+SHARED_MODEL_ATTRS = ("model", "coco_backend", "classes", "_class_map", "_output_layers",
+                      "_model_lock", "_onnx_input", "_onnx_batch", "_onnx_size",
+                      "_roboflow_input", "is_remote", "_warmed_shapes")
 
 class ModelManager:
     """Manages different AI models for video processing"""
@@ -21,7 +134,10 @@ class ModelManager:
     def __init__(self, 
                  model_name: str = "coco",
                  confidence_threshold: float = 0.5,
-                 roboflow_client = None):
+                 roboflow_client = None,
+                 device: Optional[str] = None,
+                 half: bool = True,
+                 shared: bool = True):
         """
         Initialize model manager
         
@@ -29,15 +145,70 @@ class ModelManager:
             model_name: Name of the model to use
             confidence_threshold: Minimum confidence for detections
             roboflow_client: Roboflow client instance
+            device: Inference device ("0", "cuda:0", "cpu"); defaults to the first GPU if present
+            half: Use FP16 inference (ignored on CPU)
+            shared: Reuse an already loaded model with the same settings instead of loading it again
         """
         self.model_name = model_name
         self.confidence_threshold = confidence_threshold
         self.rf = roboflow_client
         self.logger = logging.getLogger(__name__)
         
+        # Resolve inference device
+        if device is None:
+            device = "0" if _cuda_available() else "cpu"
+        self.device = str(device)
+        self.half = half and self.device != "cpu"
+        
         # Initialize model
         self.model = None
-        self._load_model()
+        self.coco_backend = None
+        
+        # Set when each prediction is a network round trip (hosted Roboflow models)
+        self.is_remote = False
+        
+        # Network input shapes torch.compile has been run on, None when not compiled
+        self._warmed_shapes = None
+        
+        # Serializes calls on a model shared between managers; OpenCV DNN nets,
+        # Ultralytics predictors and PaddleOCR keep per-call state on the model
+        self._model_lock = threading.Lock()
+        
+        if shared:
+            try:
+                # Take only the loaded model; buffers below are this instance's own
+                # Only Roboflow models depend on the client, so other models
+                # stay cached when each interpreter makes its own client
+                client = roboflow_client if is_roboflow_model(model_name) else None
+                loaded = _get_model(model_name, client, device, half)
+                for name in SHARED_MODEL_ATTRS:
+                    if hasattr(loaded, name):
+                        setattr(self, name, getattr(loaded, name))
+            except RuntimeError:
+                self._load_fallback_model()
+        else:
+            self._load_model()
+        
+        self._init_instance_state()
+    
+    def _init_instance_state(self):
+        """Allocate the per-instance buffers, streams and sessions for the loaded model"""
+        # aiohttp session for predict_async, created in the event loop that uses it
+        self._session = None
+        self._session_loop = None
+        
+        # Frame prefetching state, set up for YOLO on CUDA
+        self._copy_stream = None
+        self._prefetched = {}
+        self._next_slot = 0
+        if self.model is not None and self.model_name.lower() == "yolo":
+            self._init_prefetch()
+        
+        # Darknet input buffers, filled in place each frame
+        if self.coco_backend == "darknet":
+            self._resized = np.empty((COCO_INPUT_SIZE, COCO_INPUT_SIZE, 3), dtype=np.uint8)
+            self._rgb = np.empty_like(self._resized)
+            self._blob = np.empty((1, 3, COCO_INPUT_SIZE, COCO_INPUT_SIZE), dtype=np.float32)
     
     def _load_model(self):
         """Load the specified model"""
@@ -48,6 +219,12 @@ class ModelManager:
                 self._load_yolo_model()
             elif self.model_name.lower() == "ocr":
                 self._load_ocr_model()
+            elif self.model_name.lower() == "paddleocr":
+                self._load_paddle_ocr()
+            elif self.model_name.lower().endswith(".onnx"):
+                self._load_onnx_model()
+            elif self.model_name.lower() == "int8":
+                self._load_int8_model()
             elif self.rf is not None:
                 self._load_roboflow_model()
             else:
@@ -59,6 +236,34 @@ class ModelManager:
             self._load_fallback_model()
     
     def _load_coco_model(self):
+        """Load COCO model, preferring a TensorRT engine on NVIDIA GPUs"""
+        if YOLO is not None and _cuda_available() and self.device != "cpu":
+            try:
+                self._load_coco_engine()
+                return
+            except Exception as e:
+                self.logger.warning(f"TensorRT engine unavailable, falling back to OpenCV DNN: {e}")
+        
+        self._load_coco_darknet()
+    
+    def _load_coco_engine(self):
+        """Load YOLOv8 COCO model as a TensorRT FP16 engine"""
+        model_path = Path(__file__).parent / "weights"
+        model_path.mkdir(exist_ok=True)
+        engine_file = model_path / "yolov8n.engine"
+        
+        if not engine_file.exists():
+            # Export once; the engine is specific to the GPU it was built on
+            self.logger.info("Exporting YOLOv8 TensorRT engine (this may take a while)...")
+            exported = YOLO('yolov8n.pt').export(format='engine', half=True, imgsz=COCO_INPUT_SIZE,
+                                                 dynamic=True, batch=MAX_BATCH_SIZE)
+            Path(exported).replace(engine_file)
+        
+        self.model = YOLO(str(engine_file), task='detect')
+        self.coco_backend = "tensorrt"
+        self.logger.info("COCO TensorRT engine loaded successfully")
+    
+    def _load_coco_darknet(self):
         """Load COCO model using OpenCV DNN"""
         try:
             # Load COCO model files
@@ -76,8 +281,20 @@ class ModelManager:
             # Load model
             self.model = cv2.dnn.readNetFromDarknet(str(config_file), str(weights_file))
             
+            # Run on the GPU when OpenCV was built with CUDA
+            if OPENCV_CUDA and self.device != "cpu":
+                self.model.setPreferableBackend(cv2.dnn.DNN_BACKEND_CUDA)
+                self.model.setPreferableTarget(
+                    cv2.dnn.DNN_TARGET_CUDA_FP16 if self.half else cv2.dnn.DNN_TARGET_CUDA)
+                self.logger.info(f"OpenCV DNN using CUDA backend (half={self.half})")
+            
+            # Resolve output layers once, not per frame
+            layer_names = self.model.getLayerNames()
+            self._output_layers = [layer_names[i - 1] for i in self.model.getUnconnectedOutLayers()]
+            
             # Load COCO class names
-            self.classes = self._load_coco_classes()
+            self._set_classes(self._load_coco_classes())
+            self.coco_backend = "darknet"
             
             self.logger.info("COCO model loaded successfully")
             
@@ -92,12 +309,67 @@ class ModelManager:
             raise ImportError("Ultralytics not available")
         
         try:
+            # Ultralytics moves the weights to self.device (and FP16) on the first predict call
             self.model = YOLO('yolov8n.pt')
-            self.logger.info("YOLOv8 model loaded successfully")
+            self._compile_yolo_model()
+            self.logger.info(f"YOLOv8 model loaded successfully (device={self.device}, half={self.half})")
         except Exception as e:
             self.logger.error(f"Failed to load YOLOv8 model: {e}")
             raise
     
+    def _compile_yolo_model(self):
+        """Compile the YOLOv8 network with torch.compile on CUDA"""
+        if not _cuda_available() or self.device == "cpu" or not hasattr(torch, "compile"):
+            return
+        
+        # Frames are letterboxed to their own aspect ratio, so compile for the
+        # default capture size; warmup() covers sources that differ
+        frame_size = (int(os.getenv('RESOLUTION_WIDTH', '640')),
+                      int(os.getenv('RESOLUTION_HEIGHT', '480')))
+        
+        try:
+            # The first predict builds the Ultralytics predictor and its fused network
+            warmup = np.zeros((frame_size[1], frame_size[0], 3), dtype=np.uint8)
+            self.model(warmup, **self._yolo_kwargs())
+            
+            backend = self.model.predictor.model
+            backend.model = torch.compile(backend.model, mode='reduce-overhead', fullgraph=False)
+            self._warmed_shapes = set()
+            self.logger.info("YOLOv8 model compiled with torch.compile")
+        except Exception as e:
+            self.logger.warning(f"torch.compile unavailable, using eager model: {e}")
+            return
+        
+        self.warmup(frame_size)
+    
+    def warmup(self, frame_size: Tuple[int, int]):
+        """
+        Run a compiled model once on a blank frame of the given size
+        
+        torch.compile specializes on the input shape, and Ultralytics letterboxes
+        each frame only up to the next stride multiple, so every capture size
+        compiles separately. Warming up moves that compile off the first real
+        frame; other models return straight away.
+        
+        Args:
+            frame_size: Frame (width, height), e.g. VideoSource.get_frame_size()
+        """
+        width, height = frame_size
+        if self._warmed_shapes is None or width <= 0 or height <= 0:
+            return
+        
+        (new_width, new_height), (top, bottom, left, right) = self._letterbox_shape(height, width)
+        shape = (new_height + top + bottom, new_width + left + right)
+        
+        with self._model_lock:
+            if shape in self._warmed_shapes:
+                return
+            try:
+                self.model(np.zeros((height, width, 3), dtype=np.uint8), **self._yolo_kwargs())
+                self._warmed_shapes.add(shape)
+            except Exception as e:
+                self.logger.warning(f"YOLOv8 warm-up failed for {width}x{height}: {e}")
+    
     def _load_ocr_model(self):
         """Load OCR model for text recognition"""
         try:
@@ -109,6 +381,134 @@ class ModelManager:
             self.logger.error("pytesseract not available. Install with: pip install pytesseract")
             raise
     
+    def _load_paddle_ocr(self):
+        """Load PaddleOCR for GPU text recognition"""
+        try:
+            from paddleocr import PaddleOCR
+            self.model = PaddleOCR(use_gpu=self.device != "cpu", lang='en',
+                                   use_angle_cls=False, show_log=False)
+            self.logger.info("PaddleOCR model loaded successfully")
+        except ImportError:
+            self.logger.error("paddleocr not available. Install with: pip install paddleocr")
+            raise
+    
+    def _load_onnx_model(self):
+        """Load an exported YOLOv8 model with ONNX Runtime"""
+        if ort is None:
+            self.logger.error("ONNX Runtime not available. Install with: pip install onnxruntime-gpu")
+            raise ImportError("ONNX Runtime not available")
+        
+        try:
+            onnx_file = Path(self.model_name)
+            if not onnx_file.exists():
+                self._export_onnx_model(onnx_file)
+            
+            self._init_onnx_session(onnx_file, self._onnx_providers())
+        except Exception as e:
+            self.logger.error(f"Failed to load ONNX model: {e}")
+            raise
+    
+    def _load_int8_model(self):
+        """Load the INT8-quantized YOLOv8 model with ONNX Runtime"""
+        if ort is None:
+            self.logger.error("ONNX Runtime not available. Install with: pip install onnxruntime-gpu")
+            raise ImportError("ONNX Runtime not available")
+        
+        try:
+            model_path = Path(__file__).parent / "weights"
+            model_path.mkdir(exist_ok=True)
+            int8_file = model_path / "yolov8n_int8.onnx"
+            
+            if not int8_file.exists():
+                fp32_file = model_path / "yolov8n.onnx"
+                if not fp32_file.exists():
+                    self._export_onnx_model(fp32_file)
+                self._quantize_int8_model(fp32_file, int8_file)
+            
+            # TensorRT runs the quantized graph with INT8 kernels; the CPU
+            # provider uses VNNI where the processor has it
+            providers = ['CPUExecutionProvider']
+            if self.device != "cpu" and 'TensorrtExecutionProvider' in ort.get_available_providers():
+                providers.insert(0, ('TensorrtExecutionProvider', {'trt_int8_enable': True}))
+            
+            self._init_onnx_session(int8_file, providers)
+        except Exception as e:
+            self.logger.error(f"Failed to load INT8 model: {e}")
+            raise
+    
+    def _init_onnx_session(self, onnx_file: Path, providers: list):
+        """Create the ONNX Runtime session and read its input layout and class names"""
+        self.model = ort.InferenceSession(str(onnx_file), providers=providers)
+        
+        # Dynamic dimensions are reported as strings
+        model_input = self.model.get_inputs()[0]
+        self._onnx_input = model_input.name
+        self._onnx_batch = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+        self._onnx_size = model_input.shape[2] if isinstance(model_input.shape[2], int) else YOLO_INPUT_SIZE
+        
+        # Ultralytics stores the class names in the model metadata
+        names = self.model.get_modelmeta().custom_metadata_map.get("names")
+        if names:
+            names = ast.literal_eval(names)
+            self._set_classes(names[i] for i in sorted(names))
+        else:
+            self._set_classes(self._load_coco_classes())
+        
+        self.logger.info(f"ONNX model {onnx_file} loaded successfully "
+                         f"(providers={self.model.get_providers()})")
+    
+    def _quantize_int8_model(self, fp32_file: Path, int8_file: Path):
+        """Quantize an ONNX model to INT8, calibrating on frames from a video"""
+        from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+        
+        source = os.getenv('INT8_CALIBRATION_SOURCE', 'test_video.mp4')
+        if not Path(source).exists():
+            raise FileNotFoundError(f"Calibration video {source} not found "
+                                    "(run the video file demo in demo.py to create test_video.mp4)")
+        
+        input_name = ort.InferenceSession(str(fp32_file), providers=['CPUExecutionProvider']).get_inputs()[0].name
+        
+        class VideoCalibrationReader(CalibrationDataReader):
+            """Feeds preprocessed video frames to the calibrator one at a time"""
+            
+            def __init__(self):
+                self.cap = cv2.VideoCapture(source)
+                self.remaining = INT8_CALIBRATION_FRAMES
+            
+            def get_next(self):
+                ret, frame = self.cap.read() if self.remaining > 0 else (False, None)
+                if not ret:
+                    self.cap.release()
+                    return None
+                self.remaining -= 1
+                blob = cv2.dnn.blobFromImage(frame, 1/255.0, (YOLO_INPUT_SIZE, YOLO_INPUT_SIZE),
+                                             swapRB=True, crop=False)
+                return {input_name: blob}
+        
+        self.logger.info(f"Quantizing {fp32_file.name} to INT8 using {source}...")
+        quantize_static(str(fp32_file), str(int8_file), VideoCalibrationReader(),
+                        quant_format=QuantFormat.QDQ, activation_type=QuantType.QInt8,
+                        weight_type=QuantType.QInt8, per_channel=True)
+    
+    def _export_onnx_model(self, onnx_file: Path):
+        """Export the matching Ultralytics checkpoint to ONNX"""
+        if YOLO is None:
+            raise ImportError(f"{onnx_file} not found and Ultralytics is not available to export it")
+        
+        self.logger.info(f"Exporting {onnx_file.with_suffix('.pt').name} to ONNX...")
+        exported = YOLO(onnx_file.with_suffix('.pt').name).export(
+            format='onnx', dynamic=True, simplify=True, imgsz=YOLO_INPUT_SIZE)
+        Path(exported).replace(onnx_file)
+    
+    def _onnx_providers(self) -> list:
+        """Get ONNX Runtime execution providers in order of preference"""
+        preferred = []
+        if self.device != "cpu":
+            preferred = ['TensorrtExecutionProvider', 'CUDAExecutionProvider']
+        
+        available = ort.get_available_providers()
+        return [p for p in preferred if p in available] + ['CPUExecutionProvider']
+    
     def _load_roboflow_model(self):
         """Load custom model from Roboflow"""
         try:
@@ -116,6 +516,11 @@ class ModelManager:
             workspace = self.rf.workspace()
             project = workspace.project(self.model_name)
             self.model = project.model()
+            
+            # Local inference SDK models expose infer(); the Roboflow client
+            # takes numpy frames and only legacy clients need JPEG bytes
+            self._roboflow_input = "infer" if hasattr(self.model, 'infer') else "ndarray"
+            self.is_remote = self._roboflow_input != "infer"
             self.logger.info(f"Roboflow model {self.model_name} loaded successfully")
         except Exception as e:
             self.logger.error(f"Failed to load Roboflow model: {e}")
@@ -125,56 +530,121 @@ class ModelManager:
         """Load a simple fallback model"""
         self.logger.info("Using fallback model")
         self.model = None
+        self.is_remote = False
     
     def _download_coco_model(self, model_path: Path):
         """Download COCO model files"""
-        import urllib.request
-        
-        config_url = "https://raw.githubusercontent.com/AlexeyAB/darknet/master/cfg/yolov4.cfg"
-        weights_url = "https://github.com/AlexeyAB/darknet/releases/download/darknet_yolo_v3_optimal/yolov4.weights"
+        missing = {name: url for name, url in COCO_MODEL_FILES.items()
+                   if not (model_path / name).exists()}
         
         try:
-            # Download config file
-            urllib.request.urlretrieve(config_url, model_path / "yolov4.cfg")
-            
-            # Download weights file (large file)
-            self.logger.info("Downloading YOLOv4 weights (this may take a while)...")
-            urllib.request.urlretrieve(weights_url, model_path / "yolov4.weights")
+            # Fetch config and weights concurrently
+            self.logger.info("Downloading YOLOv4 files (the weights may take a while)...")
+            with ThreadPoolExecutor(max_workers=len(missing) or 1) as executor:
+                futures = [executor.submit(self._download_file, url, model_path / name)
+                           for name, url in missing.items()]
+                for future in futures:
+                    future.result()
             
         except Exception as e:
             self.logger.error(f"Failed to download model files: {e}")
             raise
     
-    def _load_coco_classes(self) -> list:
-        """Load COCO class names"""
-        classes_url = "https://raw.githubusercontent.com/AlexeyAB/darknet/master/data/coco.names"
+    def _download_file(self, url: str, destination: Path):
+        """Stream a file to disk, resuming partial downloads and checking the final size"""
+        import requests
         
-        try:
-            import urllib.request
-            response = urllib.request.urlopen(classes_url)
-            classes = response.read().decode().strip().split('\n')
-            return classes
-        except Exception as e:
-            self.logger.warning(f"Failed to load COCO classes: {e}")
-            return []
+        # Write to a side file so an interrupted download is never loaded as the model
+        partial = destination.with_name(destination.name + ".part")
+        
+        for attempt in range(1, DOWNLOAD_RETRIES + 1):
+            try:
+                offset = partial.stat().st_size if partial.exists() else 0
+                # Identity encoding keeps the byte counts comparable with the file on disk
+                headers = {"Accept-Encoding": "identity"}
+                if offset:
+                    headers["Range"] = f"bytes={offset}-"
+                
+                with requests.get(url, headers=headers, stream=True, timeout=30) as response:
+                    # 416: the range starts at or past the end of the file
+                    if response.status_code != 416:
+                        response.raise_for_status()
+                        
+                        # Start over if the server ignored the range request
+                        mode = "ab" if response.status_code == 206 else "wb"
+                        with open(partial, mode) as f:
+                            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                                f.write(chunk)
+                    
+                    status, expected = response.status_code, self._download_total(response)
+                
+            except requests.RequestException as e:
+                self.logger.warning(f"Download of {destination.name} interrupted "
+                                    f"(attempt {attempt}/{DOWNLOAD_RETRIES}): {e}")
+                continue
+            
+            # A stale or oversized partial file must not be moved into place; only a
+            # complete 200 response may go unchecked when the server gives no size
+            size = partial.stat().st_size if partial.exists() else 0
+            if size != expected and not (expected is None and status == 200):
+                self.logger.warning(f"Download of {destination.name} is {size} bytes, expected "
+                                    f"{expected} (attempt {attempt}/{DOWNLOAD_RETRIES}); restarting")
+                partial.unlink(missing_ok=True)
+                continue
+            
+            partial.replace(destination)
+            return
+        
+        raise IOError(f"Failed to download {url} after {DOWNLOAD_RETRIES} attempts")
+    
+    @staticmethod
+    def _download_total(response) -> Optional[int]:
+        """Full size of the file behind a download response, or None if the server does not say"""
+        # 206 and 416 responses carry "bytes <range>/<total>"
+        content_range = response.headers.get("Content-Range", "")
+        total = content_range.rpartition("/")[2]
+        if total.isdigit():
+            return int(total)
+        
+        length = response.headers.get("Content-Length", "")
+        if response.status_code == 200 and length.isdigit():
+            return int(length)
+        return None
+    
+    def _load_coco_classes(self) -> tuple:
+        """Load COCO class names"""
+        return COCO_CLASSES
+    
+    def _set_classes(self, classes):
+        """Store class names and the id -> name lookup used in post-processing"""
+        self.classes = tuple(classes)
+        self._class_map = dict(enumerate(self.classes))
     
     def predict(self, frame: np.ndarray) -> Dict[str, Any]:
         """
         Run prediction on frame
         
         Args:
-            frame: Input frame as numpy array
+            frame: Input frame as numpy array or cv2.cuda_GpuMat
             
         Returns:
             Dictionary containing prediction results
         """
         try:
+            # Only the Darknet COCO and Tesseract paths preprocess on the GPU
+            if _is_gpu_mat(frame) and not self._accepts_gpu_frames():
+                frame = frame.download()
+            
             if self.model_name.lower() == "coco":
                 return self._predict_coco(frame)
             elif self.model_name.lower() == "yolo":
                 return self._predict_yolo(frame)
             elif self.model_name.lower() == "ocr":
                 return self._predict_ocr(frame)
+            elif self.model_name.lower() == "paddleocr":
+                return self._predict_paddle_ocr(frame)
+            elif self._is_onnx_model():
+                return self._predict_onnx(frame)
             elif self.rf is not None:
                 return self._predict_roboflow(frame)
             else:
@@ -184,52 +654,147 @@ class ModelManager:
             self.logger.error(f"Prediction failed: {e}")
             return {"predictions": [], "error": str(e)}
     
-    def _predict_coco(self, frame: np.ndarray) -> Dict[str, Any]:
+    def predict_batch(self, frames: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        Run prediction on several frames at once
+        
+        Args:
+            frames: Input frames as numpy arrays
+            
+        Returns:
+            List of prediction results, one per frame
+        """
+        if not frames:
+            return []
+        
+        try:
+            frames = [frame.download() if _is_gpu_mat(frame) else frame for frame in frames]
+            
+            if self.model_name.lower() == "coco":
+                return self._predict_coco_batch(frames)
+            elif self.model_name.lower() == "yolo":
+                return self._predict_yolo_batch(frames)
+            elif self._is_onnx_model():
+                return self._predict_onnx_batch(frames)
+            else:
+                # Remaining models have no batched forward pass
+                return [self.predict(frame) for frame in frames]
+                
+        except Exception as e:
+            self.logger.error(f"Batch prediction failed: {e}")
+            return [{"predictions": [], "error": str(e)} for _ in frames]
+    
+    def _is_onnx_model(self) -> bool:
+        """Check whether the loaded model is an ONNX Runtime session"""
+        return self.model_name.lower().endswith(".onnx") or self.model_name.lower() == "int8"
+    
+    def _accepts_gpu_frames(self) -> bool:
+        """Check whether the loaded model can take cv2.cuda_GpuMat frames"""
+        return (self.model_name.lower() == "ocr"
+                or (self.model_name.lower() == "coco" and self.coco_backend == "darknet"))
+    
+    def _predict_coco(self, frame) -> Dict[str, Any]:
         """Run COCO model prediction"""
         if self.model is None:
             return {"predictions": []}
         
+        if self.coco_backend == "tensorrt":
+            return self._predict_coco_engine(frame)
+        
         try:
             # Prepare input
-            blob = cv2.dnn.blobFromImage(frame, 1/255.0, (416, 416), swapRB=True, crop=False)
-            self.model.setInput(blob)
+            blob = self._prepare_coco_blob(frame)
             
-            # Get output layers
-            layer_names = self.model.getLayerNames()
-            output_layers = [layer_names[i - 1] for i in self.model.getUnconnectedOutLayers()]
+            # Forward pass; the net's input slot is shared with other managers
+            with self._model_lock:
+                self.model.setInput(blob)
+                outputs = self.model.forward(self._output_layers)
             
-            # Forward pass
-            outputs = self.model.forward(output_layers)
+            return {"predictions": self._parse_coco_outputs(outputs, frame)}
             
-            # Process detections
-            predictions = []
-            height, width = frame.shape[:2]
+        except Exception as e:
+            self.logger.error(f"COCO prediction failed: {e}")
+            return {"predictions": []}
+    
+    def _predict_coco_batch(self, frames: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """Run COCO model prediction on a batch of frames in one forward pass"""
+        if self.model is None:
+            return [{"predictions": []} for _ in frames]
+        
+        if self.coco_backend == "tensorrt":
+            # The engine is built for at most MAX_BATCH_SIZE frames
+            return [result for i in range(0, len(frames), MAX_BATCH_SIZE)
+                    for result in self._predict_yolo_batch(frames[i:i + MAX_BATCH_SIZE])]
+        
+        try:
+            blob = cv2.dnn.blobFromImages(frames, 1/255.0, (COCO_INPUT_SIZE, COCO_INPUT_SIZE),
+                                          swapRB=True, crop=False)
+            with self._model_lock:
+                self.model.setInput(blob)
+                outputs = self.model.forward(self._output_layers)
             
-            for output in outputs:
-                for detection in output:
-                    scores = detection[5:]
-                    class_id = np.argmax(scores)
-                    confidence = scores[class_id]
-                    
-                    if confidence > self.confidence_threshold:
-                        center_x = int(detection[0] * width)
-                        center_y = int(detection[1] * height)
-                        w = int(detection[2] * width)
-                        h = int(detection[3] * height)
-                        
-                        x = center_x - w // 2
-                        y = center_y - h // 2
-                        
-                        predictions.append({
-                            "class": self.classes[class_id] if class_id < len(self.classes) else "Unknown",
-                            "confidence": float(confidence),
-                            "x": center_x / width,
-                            "y": center_y / height,
-                            "width": w / width,
-                            "height": h / height
-                        })
+            # Split each output layer back into one block of detections per frame
+            outputs = [np.reshape(output, (len(frames), -1, output.shape[-1])) for output in outputs]
             
-            return {"predictions": predictions}
+            return [{"predictions": self._parse_coco_outputs([output[i] for output in outputs], frame)}
+                    for i, frame in enumerate(frames)]
+            
+        except Exception as e:
+            self.logger.error(f"COCO batch prediction failed: {e}")
+            return [{"predictions": []} for _ in frames]
+    
+    def _prepare_coco_blob(self, frame) -> np.ndarray:
+        """Fill the preallocated input blob from a BGR numpy or GPU frame"""
+        # Same as blobFromImage(frame, 1/255.0, size, swapRB=True, crop=False),
+        # which cannot write into an existing array from Python
+        if _is_gpu_mat(frame):
+            # Resize and convert on the GPU, then download only the network input
+            gpu_resized = cv2.cuda.resize(frame, (COCO_INPUT_SIZE, COCO_INPUT_SIZE))
+            cv2.cuda.cvtColor(gpu_resized, cv2.COLOR_BGR2RGB).download(self._rgb)
+        else:
+            cv2.resize(frame, (COCO_INPUT_SIZE, COCO_INPUT_SIZE), dst=self._resized)
+            cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        np.multiply(self._rgb.transpose(2, 0, 1), np.float32(1/255.0), out=self._blob[0])
+        return self._blob
+    
+    def _parse_coco_outputs(self, outputs, frame: np.ndarray) -> list:
+        """Convert Darknet output layers to normalized predictions"""
+        # Rows are [cx, cy, w, h, objectness, class scores...]
+        detections = np.concatenate(outputs, axis=0)
+        return self._postprocess_boxes(detections[:, :4], detections[:, 5:], frame)
+    
+    def _postprocess_boxes(self, boxes: np.ndarray, scores: np.ndarray, frame: np.ndarray) -> list:
+        """Threshold and de-duplicate normalized cx, cy, w, h boxes against per-class scores"""
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(scores.shape[0]), class_ids]
+        
+        mask = confidences > self.confidence_threshold
+        if not mask.any():
+            return []
+        boxes, class_ids, confidences = boxes[mask], class_ids[mask], confidences[mask]
+        
+        # Non-maximum suppression works on top-left pixel boxes
+        height, width = _frame_shape(frame)
+        pixel_boxes = boxes * np.array([width, height, width, height], dtype=np.float32)
+        pixel_boxes[:, :2] -= pixel_boxes[:, 2:] / 2
+        keep = cv2.dnn.NMSBoxesBatched(pixel_boxes.tolist(), confidences.tolist(), class_ids.tolist(),
+                                       self.confidence_threshold, NMS_THRESHOLD)
+        
+        return [{
+            "class": self._class_map.get(int(class_ids[i]), "Unknown"),
+            "confidence": float(confidences[i]),
+            "x": float(boxes[i, 0]),
+            "y": float(boxes[i, 1]),
+            "width": float(boxes[i, 2]),
+            "height": float(boxes[i, 3])
+        } for i in np.asarray(keep, dtype=int).flatten()]
+    
+    def _predict_coco_engine(self, frame: np.ndarray) -> Dict[str, Any]:
+        """Run COCO prediction on the TensorRT engine"""
+        try:
+            with self._model_lock:
+                results = self.model(frame, **self._yolo_kwargs())
+            return {"predictions": self._parse_yolo_results(results)}
             
         except Exception as e:
             self.logger.error(f"COCO prediction failed: {e}")
@@ -241,53 +806,246 @@ class ModelManager:
             return {"predictions": []}
         
         try:
-            results = self.model(frame, conf=self.confidence_threshold)
+            # Use the copy already uploaded by prefetch() when there is one
+            entry = self._prefetched.pop(id(frame), None) if self._copy_stream is not None else None
+            if entry is not None and entry[0] is frame:
+                tensor = self._prefetched_tensor(entry[1])
+                with self._model_lock:
+                    results = self.model(tensor, **self._yolo_kwargs())
+                return {"predictions": self._parse_yolo_results(results, orig_shape=frame.shape)}
             
-            predictions = []
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        conf = box.conf[0].cpu().numpy()
-                        cls = int(box.cls[0].cpu().numpy())
-                        
-                        # Convert to normalized coordinates
-                        height, width = frame.shape[:2]
-                        center_x = (x1 + x2) / 2 / width
-                        center_y = (y1 + y2) / 2 / height
-                        w = (x2 - x1) / width
-                        h = (y2 - y1) / height
-                        
-                        predictions.append({
-                            "class": self.model.names[cls],
-                            "confidence": float(conf),
-                            "x": center_x,
-                            "y": center_y,
-                            "width": w,
-                            "height": h
-                        })
-            
-            return {"predictions": predictions}
+            with self._model_lock:
+                results = self.model(frame, **self._yolo_kwargs())
+            return {"predictions": self._parse_yolo_results(results)}
             
         except Exception as e:
             self.logger.error(f"YOLOv8 prediction failed: {e}")
             return {"predictions": []}
     
-    def _predict_ocr(self, frame: np.ndarray) -> Dict[str, Any]:
+    def prefetch(self, frame: np.ndarray):
+        """
+        Start uploading a frame to the GPU so the next predict() can skip the copy
+        
+        Call with the upcoming frame before predicting the current one; the
+        copy runs on a separate CUDA stream and overlaps with inference.
+        
+        Args:
+            frame: Frame that will be passed to predict() next
+        """
+        if self._copy_stream is None or self.model_name.lower() != "yolo":
+            return
+        
+        slot = self._next_slot
+        self._next_slot = 1 - slot
+        
+        # Wait until the previous upload from this slot's host buffer is done
+        self._copy_events[slot].synchronize()
+        self._prefetched = {key: entry for key, entry in self._prefetched.items() if entry[1] != slot}
+        
+        # Letterbox straight into pinned memory, then copy asynchronously
+        self._letterbox_into(frame, self._slot_buffer(slot, frame.shape[:2]))
+        with torch.cuda.stream(self._copy_stream):
+            self._dev_bufs[slot].copy_(self._host_bufs[slot], non_blocking=True)
+            self._copy_events[slot].record(self._copy_stream)
+        
+        self._prefetched[id(frame)] = (frame, slot)
+    
+    def _letterbox_shape(self, height: int, width: int):
+        """
+        Geometry Ultralytics' LetterBox uses for a frame of this size
+        
+        Returns:
+            (resized width, resized height), (top, bottom, left, right) padding
+        """
+        # Scale to fit, then pad only up to the next stride multiple (auto=True)
+        ratio = min(YOLO_INPUT_SIZE / height, YOLO_INPUT_SIZE / width)
+        new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+        pad_w = ((YOLO_INPUT_SIZE - new_width) % YOLO_STRIDE) / 2
+        pad_h = ((YOLO_INPUT_SIZE - new_height) % YOLO_STRIDE) / 2
+        
+        top, bottom = int(round(pad_h - 0.1)), int(round(pad_h + 0.1))
+        left, right = int(round(pad_w - 0.1)), int(round(pad_w + 0.1))
+        return (new_width, new_height), (top, bottom, left, right)
+    
+    def _slot_buffer(self, slot: int, frame_shape) -> np.ndarray:
+        """Host buffer of a prefetch slot sized for this frame's letterbox, reallocated on change"""
+        (new_width, new_height), (top, bottom, left, right) = self._letterbox_shape(*frame_shape)
+        shape = (new_height + top + bottom, new_width + left + right, 3)
+        
+        if self._host_bufs[slot] is None or tuple(self._host_bufs[slot].shape) != shape:
+            self._host_bufs[slot] = torch.empty(shape, dtype=torch.uint8, pin_memory=True)
+            self._dev_bufs[slot] = torch.empty(shape, dtype=torch.uint8, device=self._copy_stream.device)
+        return self._host_bufs[slot].numpy()
+    
+    def _letterbox_into(self, frame: np.ndarray, out: np.ndarray):
+        """Resize and pad a frame into out exactly as Ultralytics' LetterBox does"""
+        (new_width, new_height), (top, bottom, left, right) = self._letterbox_shape(*frame.shape[:2])
+        inner = out[top:top + new_height, left:left + new_width]
+        
+        if frame.shape[1] == new_width and frame.shape[0] == new_height:
+            np.copyto(inner, frame)
+        else:
+            cv2.resize(frame, (new_width, new_height), dst=inner, interpolation=cv2.INTER_LINEAR)
+        
+        # Fill only the padding bands
+        out[:top] = LETTERBOX_FILL
+        out[top + new_height:] = LETTERBOX_FILL
+        out[top:top + new_height, :left] = LETTERBOX_FILL
+        out[top:top + new_height, left + new_width:] = LETTERBOX_FILL
+    
+    def _prefetched_tensor(self, slot: int):
+        """Turn an uploaded BGR frame into the normalized RGB tensor Ultralytics expects"""
+        torch.cuda.current_stream().wait_event(self._copy_events[slot])
+        
+        tensor = self._dev_bufs[slot].flip(-1).permute(2, 0, 1).unsqueeze(0)
+        tensor = tensor.half() if self.half else tensor.float()
+        return tensor / 255
+    
+    def _init_prefetch(self):
+        """Set up the copy stream and double-buffered slots for frame uploads"""
+        if not _cuda_available() or self.device == "cpu" or yolo_ops is None:
+            return
+        
+        device = torch.device(f"cuda:{self.device}" if self.device.isdigit() else self.device)
+        
+        # Pinned host and device buffers are sized by _slot_buffer for the frames seen
+        self._copy_stream = torch.cuda.Stream(device)
+        self._host_bufs = [None, None]
+        self._dev_bufs = [None, None]
+        self._copy_events = [torch.cuda.Event() for _ in range(2)]
+    
+    def _predict_yolo_batch(self, frames: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """Run Ultralytics prediction on a batch of frames in one forward pass"""
+        if self.model is None:
+            return [{"predictions": []} for _ in frames]
+        
+        try:
+            # Ultralytics batches a list of frames internally, one result per frame
+            with self._model_lock:
+                results = self.model(frames, **self._yolo_kwargs())
+            return [{"predictions": self._parse_yolo_results([result])}
+                    for result in results]
+            
+        except Exception as e:
+            self.logger.error(f"YOLOv8 batch prediction failed: {e}")
+            return [{"predictions": []} for _ in frames]
+    
+    def _yolo_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for Ultralytics predict calls"""
+        if self.coco_backend == "tensorrt":
+            # The engine is built in FP16 at the COCO input size
+            return {"conf": self.confidence_threshold, "device": self.device,
+                    "half": True, "imgsz": COCO_INPUT_SIZE, "verbose": False}
+        
+        return {"conf": self.confidence_threshold, "device": self.device,
+                "half": self.half, "imgsz": YOLO_INPUT_SIZE, "verbose": False}
+    
+    def _parse_yolo_results(self, results, orig_shape=None) -> list:
+        """
+        Convert Ultralytics results to normalized predictions
+        
+        Args:
+            results: Ultralytics results
+            orig_shape: Frame shape when the model was given a letterboxed
+                prefetched tensor; boxes are mapped back to the frame first
+        """
+        predictions = []
+        
+        for result in results:
+            boxes = result.boxes
+            if boxes is None or len(boxes) == 0:
+                continue
+            
+            xyxy = boxes.xyxy
+            if orig_shape is not None:
+                # Undo the letterbox padding and scale, as Ultralytics does for frames
+                xyxy = yolo_ops.scale_boxes(result.orig_shape[:2], xyxy.clone(), orig_shape[:2])
+                height, width = orig_shape[:2]
+            else:
+                height, width = result.orig_shape[:2]
+            
+            # One device-to-host copy per tensor instead of one per box
+            xyxy = xyxy.cpu().numpy()
+            confs = boxes.conf.cpu().numpy()
+            clss = boxes.cls.cpu().numpy().astype(int)
+            
+            # Convert to normalized coordinates
+            center_x = (xyxy[:, 0] + xyxy[:, 2]) / 2 / width
+            center_y = (xyxy[:, 1] + xyxy[:, 3]) / 2 / height
+            w = (xyxy[:, 2] - xyxy[:, 0]) / width
+            h = (xyxy[:, 3] - xyxy[:, 1]) / height
+            
+            for i in range(len(clss)):
+                predictions.append({
+                    "class": self.model.names[clss[i]],
+                    "confidence": float(confs[i]),
+                    "x": float(center_x[i]),
+                    "y": float(center_y[i]),
+                    "width": float(w[i]),
+                    "height": float(h[i])
+                })
+        
+        return predictions
+    
+    def _predict_onnx(self, frame: np.ndarray) -> Dict[str, Any]:
+        """Run ONNX Runtime model prediction"""
+        return self._predict_onnx_batch([frame])[0]
+    
+    def _predict_onnx_batch(self, frames: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """Run ONNX Runtime model prediction on a batch of frames in one session run"""
+        if self.model is None:
+            return [{"predictions": []} for _ in frames]
+        
+        if self._onnx_batch is not None and len(frames) > self._onnx_batch:
+            # Static-batch export, run in chunks the model accepts
+            return [result for i in range(0, len(frames), self._onnx_batch)
+                    for result in self._predict_onnx_batch(frames[i:i + self._onnx_batch])]
+        
+        try:
+            size = self._onnx_size
+            blob = cv2.dnn.blobFromImages(frames, 1/255.0, (size, size), swapRB=True, crop=False)
+            
+            # (N, 4 + classes, anchors) -> (N, anchors, 4 + classes), boxes in input pixels
+            outputs = self.model.run(None, {self._onnx_input: blob})[0].transpose(0, 2, 1)
+            
+            return [{"predictions": self._postprocess_boxes(output[:, :4] / size, output[:, 4:], frame)}
+                    for output, frame in zip(outputs, frames)]
+            
+        except Exception as e:
+            self.logger.error(f"ONNX prediction failed: {e}")
+            return [{"predictions": []} for _ in frames]
+    
+    def _predict_ocr(self, frame) -> Dict[str, Any]:
         """Run OCR prediction"""
         if self.model is None:
             return {"predictions": []}
         
         try:
+            # Tesseract cost scales with pixel count; downscale and binarize
+            frame_height, frame_width = _frame_shape(frame)
+            scale = min(1.0, OCR_MAX_HEIGHT / frame_height)
+            size = (round(frame_width * scale), round(frame_height * scale))
+            
             # Convert to grayscale for better OCR
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if _is_gpu_mat(frame):
+                # Convert and shrink on the GPU, download only the small grayscale image
+                gpu_gray = cv2.cuda.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                if scale < 1.0:
+                    gpu_gray = cv2.cuda.resize(gpu_gray, size, interpolation=cv2.INTER_AREA)
+                gray = gpu_gray.download()
+            else:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                if scale < 1.0:
+                    gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
             
-            # Run OCR
-            text = self.model.image_to_string(gray)
+            # Run OCR once; the full text is rebuilt from the word boxes
+            data = self.model.image_to_data(binary, config=OCR_CONFIG,
+                                            output_type=self.model.Output.DICT)
+            text = ' '.join(t for t in data['text'] if t.strip())
             
-            # Extract text regions
-            data = self.model.image_to_data(gray, output_type=self.model.Output.DICT)
+            # Boxes are in OCR-input pixels; normalizing by its size undoes the downscale
+            height, width = binary.shape[:2]
             
             predictions = []
             for i, conf in enumerate(data['conf']):
@@ -300,7 +1058,6 @@ class ModelManager:
                         h = data['height'][i]
                         
                         # Convert to normalized coordinates
-                        height, width = frame.shape[:2]
                         center_x = (x + w/2) / width
                         center_y = (y + h/2) / height
                         
@@ -320,25 +1077,187 @@ class ModelManager:
             self.logger.error(f"OCR prediction failed: {e}")
             return {"predictions": []}
     
+    def _predict_paddle_ocr(self, frame: np.ndarray) -> Dict[str, Any]:
+        """Run PaddleOCR prediction"""
+        if self.model is None:
+            return {"predictions": []}
+        
+        try:
+            # Detection and recognition in a single pass; None when no text is found
+            with self._model_lock:
+                lines = self.model.ocr(frame, cls=False)[0] or []
+            
+            predictions = []
+            height, width = frame.shape[:2]
+            for points, (text_val, conf) in lines:
+                if conf > self.confidence_threshold and text_val.strip():
+                    points = np.asarray(points, dtype=np.float32)
+                    x1, y1 = points.min(axis=0)
+                    x2, y2 = points.max(axis=0)
+                    
+                    predictions.append({
+                        "class": "text",
+                        "text": text_val,
+                        "confidence": float(conf),
+                        "x": float((x1 + x2) / 2 / width),
+                        "y": float((y1 + y2) / 2 / height),
+                        "width": float((x2 - x1) / width),
+                        "height": float((y2 - y1) / height)
+                    })
+            
+            full_text = ' '.join(text_val for _, (text_val, _) in lines if text_val.strip())
+            return {"predictions": predictions, "full_text": full_text}
+            
+        except Exception as e:
+            self.logger.error(f"PaddleOCR prediction failed: {e}")
+            return {"predictions": []}
+    
     def _predict_roboflow(self, frame: np.ndarray) -> Dict[str, Any]:
         """Run Roboflow model prediction"""
         if self.model is None:
             return {"predictions": []}
         
         try:
-            # Convert frame to bytes for Roboflow API
-            _, buffer = cv2.imencode('.jpg', frame)
-            image_bytes = buffer.tobytes()
+            if self._roboflow_input == "infer":
+                # Frames go straight to the local inference server, no codec pass
+                responses = self.model.infer(frame, confidence=self.confidence_threshold)
+                return self._parse_inference_response(responses, frame)
             
-            # Run prediction
-            result = self.model.predict(image_bytes, confidence=self.confidence_threshold)
+            result = None
+            if self._roboflow_input == "ndarray":
+                try:
+                    result = self.model.predict(frame, confidence=self.confidence_threshold)
+                except TypeError:
+                    self.logger.info("Roboflow client does not accept frames, sending JPEG bytes")
+                    self._roboflow_input = "jpeg"
+            
+            if result is None:
+                # Convert frame to bytes for legacy Roboflow clients
+                image_bytes = self._encode_roboflow_jpeg(frame)
+                
+                # Run prediction
+                result = self.model.predict(image_bytes, confidence=self.confidence_threshold)
             
-            return result
+            # The SDK returns a prediction group whose json() matches the hosted API
+            if hasattr(result, 'json'):
+                result = result.json()
+            return self._parse_hosted_response(result, frame)
             
         except Exception as e:
             self.logger.error(f"Roboflow prediction failed: {e}")
             return {"predictions": []}
     
+    def _encode_roboflow_jpeg(self, frame: np.ndarray) -> bytes:
+        """JPEG-encode a frame for upload, with libjpeg-turbo when available"""
+        tj = get_turbojpeg()
+        if tj is not None:
+            return tj.encode(frame, quality=ROBOFLOW_JPEG_QUALITY)
+        _, buffer = cv2.imencode('.jpg', frame, ROBOFLOW_JPEG_PARAMS)
+        return buffer.tobytes()
+    
+    def supports_async(self) -> bool:
+        """Check whether predict_async talks to the hosted API without blocking a thread"""
+        return aiohttp is not None and self.is_remote and self._hosted_endpoint() is not None
+    
+    def _hosted_endpoint(self) -> Optional[str]:
+        """URL of the hosted API for the loaded Roboflow model, as the SDK builds it"""
+        project = getattr(self.model, 'dataset_id', None)
+        version = getattr(self.model, 'version', None)
+        if not project or not version:
+            return None
+        return f"{ROBOFLOW_API_URL}/{project}/{version}"
+    
+    def _api_key(self) -> str:
+        """Roboflow API key, from the client or the environment"""
+        return getattr(self.rf, 'api_key', None) or os.getenv('ROBOFLOW_API_KEY', '')
+    
+    def _get_session(self):
+        """Get the aiohttp session for the running event loop, reusing its connections"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=ROBOFLOW_CONNECTIONS,
+                                             keepalive_timeout=ROBOFLOW_KEEPALIVE)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._session_loop = loop
+        return self._session
+    
+    async def predict_async(self, frame: np.ndarray) -> Dict[str, Any]:
+        """
+        Run prediction without blocking the event loop
+        
+        Hosted Roboflow models are queried over a pooled aiohttp session, so many
+        requests can be in flight at once; other models run predict() in a thread.
+        
+        Args:
+            frame: Input frame as numpy array
+            
+        Returns:
+            Dictionary containing prediction results
+            
+        Raises:
+            aiohttp.ClientError: If a hosted request fails, so a failure is not
+                mistaken for a frame with no detections
+        """
+        if not self.supports_async():
+            return await asyncio.to_thread(self.predict, frame)
+        
+        image = base64.b64encode(await asyncio.to_thread(self._encode_roboflow_jpeg, frame))
+        params = {
+            "api_key": self._api_key(),
+            "confidence": int(self.confidence_threshold * 100),
+        }
+        
+        async with self._get_session().post(
+                self._hosted_endpoint(), params=params, data=image,
+                headers={"Content-Type": "application/x-www-form-urlencoded"}) as response:
+            response.raise_for_status()
+            result = await response.json()
+        
+        return self._parse_hosted_response(result, frame)
+    
+    async def close_async(self):
+        """Close the aiohttp session used by predict_async"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    def _parse_hosted_response(self, result: Dict[str, Any], frame: np.ndarray) -> Dict[str, Any]:
+        """Convert a hosted API response (pixel boxes) to normalized predictions"""
+        height, width = frame.shape[:2]
+        
+        return {"predictions": [{
+            "class": p.get("class", "Unknown"),
+            "confidence": float(p.get("confidence", 0)),
+            "x": p.get("x", 0) / width,
+            "y": p.get("y", 0) / height,
+            "width": p.get("width", 0) / width,
+            "height": p.get("height", 0) / height
+        } for p in result.get("predictions", [])]}
+    
+    def _parse_inference_response(self, responses, frame: np.ndarray) -> Dict[str, Any]:
+        """Convert an inference SDK response (pixel boxes) to normalized predictions"""
+        response = responses[0] if isinstance(responses, list) else responses
+        height, width = frame.shape[:2]
+        
+        return {"predictions": [{
+            "class": p.class_name,
+            "confidence": float(p.confidence),
+            "x": p.x / width,
+            "y": p.y / height,
+            "width": p.width / width,
+            "height": p.height / height
+        } for p in response.predictions]}
+    
     def _predict_fallback(self, frame: np.ndarray) -> Dict[str, Any]:
         """Fallback prediction (no-op)"""
-        return {"predictions": [], "message": "No model loaded"} 
\ No newline at end of file
+        return {"predictions": [], "message": "No model loaded"} 
+
+@functools.lru_cache(maxsize=8)
+def _get_model(model_name: str, roboflow_client, device: Optional[str], half: bool) -> ModelManager:
+    """Load a model once per process and return the manager holding it"""
+    manager = ModelManager(model_name, roboflow_client=roboflow_client,
+                           device=device, half=half, shared=False)
+    if manager.model is None:
+        # Raising keeps failed and fallback loads out of the cache
+        raise RuntimeError(f"Model {model_name} could not be loaded")
+    return manager
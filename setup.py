@@ -47,6 +47,8 @@ DEFAULT_SOURCE=0
 FRAME_RATE=30
 RESOLUTION_WIDTH=640
 RESOLUTION_HEIGHT=480
+CAPTURE_FOURCC=MJPG
+FRAME_SAMPLE_EVERY=1
 
 # Output Configuration
 SAVE_DETECTIONS=true
@@ -3,12 +3,13 @@ Streamlit Web Interface for AI Video Stream Interpreter
 """
 
 import streamlit as st
-import cv2
 import numpy as np
-import time
 import os
 from pathlib import Path
 import json
+from collections import Counter, deque
+from itertools import islice
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -20,6 +21,175 @@ sys.path.append(str(Path(__file__).parent))
 
 from video_interpreter import VideoInterpreter
 from utils.logger import setup_logger
+from utils.video_utils import FrameProcessor
+
+if TYPE_CHECKING:
+    from models.model_manager import ModelManager
+
+# Detections kept for the statistics and history panels
+HISTORY_SIZE = 50
+
+# Interval between video panel refreshes (about 30 FPS)
+REFRESH_INTERVAL = "33ms"
+
+# JPEG quality for frames sent to the browser; PNG encoding is far slower
+DISPLAY_JPEG_QUALITY = 80
+
+@st.cache_resource
+def get_source_options() -> dict:
+    """Video source choices, built once per server process"""
+    return {
+        "Webcam": "0",
+        "File Upload": "upload",
+        "RTSP Stream": "rtsp"
+    }
+
+@st.cache_resource
+def get_model_options() -> tuple:
+    """Model choices, built once per server process"""
+    return ("coco", "yolo", "ocr", "paddleocr")
+
+@st.cache_resource
+def get_roboflow_client(api_key: str):
+    """Create the Roboflow client once per API key; failures are not cached"""
+    from roboflow import Roboflow
+    return Roboflow(api_key=api_key)
+
+def create_model_manager(model_name: str, confidence: float) -> "ModelManager":
+    """
+    Create this session's model manager
+    
+    The loaded model is shared per (model, client) inside ModelManager, so only
+    the confidence threshold and inference buffers are per session.
+    """
+    from models.model_manager import ModelManager, is_roboflow_model
+    
+    # Built-in models run without Roboflow, so a bad key or no network
+    # cannot stop them from starting
+    roboflow_client = None
+    api_key = os.getenv('ROBOFLOW_API_KEY', '')
+    if api_key and is_roboflow_model(model_name):
+        try:
+            roboflow_client = get_roboflow_client(api_key)
+        except Exception as e:
+            setup_logger().error(f"Failed to initialize Roboflow: {e}")
+    
+    return ModelManager(
+        model_name=model_name,
+        confidence_threshold=confidence,
+        roboflow_client=roboflow_client
+    )
+
+def create_interpreter(source: str, model: str, confidence: float,
+                       sample_every: int) -> VideoInterpreter:
+    """
+    Create an interpreter and its video source for this session
+    
+    Only the model is shared between sessions; each session opens and
+    releases its own capture, so one user's Stop leaves other streams running.
+    """
+    return VideoInterpreter(
+        source=source,
+        model=model,
+        confidence_threshold=confidence,
+        output_dir="./output",
+        vid_stride=sample_every,
+        model_manager=create_model_manager(model, confidence)
+    )
+
+def release_interpreter():
+    """Release this session's capture and detection log, if it has an interpreter"""
+    if st.session_state.interpreter is not None:
+        st.session_state.interpreter.cleanup()
+        st.session_state.interpreter = None
+    st.session_state.is_running = False
+
+def record_detections(history: deque, class_counts: Counter, predictions):
+    """Append predictions to the history, keeping per-class counts in step with evictions"""
+    for prediction in predictions:
+        if len(history) == history.maxlen:
+            evicted = history[0].get('class', 'Unknown')
+            class_counts[evicted] -= 1
+            if class_counts[evicted] <= 0:
+                del class_counts[evicted]
+        
+        history.append(prediction)
+        class_counts[prediction.get('class', 'Unknown')] += 1
+
+@st.fragment(run_every=REFRESH_INTERVAL)
+def render_stream(save_detections: bool):
+    """Show the video and detection panels, rerunning without the rest of the page"""
+    # Main content area
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.header("Live Video Stream")
+        
+        # Video display placeholder
+        video_placeholder = st.empty()
+        
+        # Detection results placeholder
+        results_placeholder = st.empty()
+    
+    with col2:
+        st.header("Detection Results")
+        
+        # Statistics
+        stats_placeholder = st.empty()
+        
+        # Recent detections
+        detections_placeholder = st.empty()
+    
+    # Process the newest frame; the fragment reruns on its own timer
+    if st.session_state.is_running and st.session_state.interpreter:
+        try:
+            # Take the newest frame from the capture thread
+            frame = st.session_state.interpreter.capture.latest(timeout=0.1)
+            
+            if frame is not None:
+                # Process frame
+                annotated_frame, detections = st.session_state.interpreter.process_frame(frame)
+                
+                # Display video as JPEG bytes so Streamlit does not PNG-encode the array
+                jpeg = FrameProcessor.encode_jpeg(annotated_frame, DISPLAY_JPEG_QUALITY)
+                if jpeg is not None:
+                    video_placeholder.image(jpeg, channels="BGR", use_column_width=True)
+                
+                # Update detection results
+                if detections and 'predictions' in detections:
+                    # The deque drops the oldest detections once full
+                    record_detections(st.session_state.detection_history,
+                                      st.session_state.class_counts,
+                                      detections['predictions'])
+                
+                # Panels are rebuilt on every run, so redraw them from the kept history
+                if st.session_state.detection_history:
+                    # Display statistics
+                    with stats_placeholder.container():
+                        st.metric("Total Detections", len(st.session_state.detection_history))
+                        st.metric("Current FPS", f"{st.session_state.interpreter.fps:.1f}")
+                        
+                        # Class distribution
+                        if st.session_state.class_counts:
+                            st.write("**Class Distribution:**")
+                            for class_name, count in st.session_state.class_counts.items():
+                                st.write(f"- {class_name}: {count}")
+                    
+                    # Display recent detections
+                    with detections_placeholder.container():
+                        st.write("**Recent Detections:**")
+                        for detection in islice(reversed(st.session_state.detection_history), 10):
+                            confidence = detection.get('confidence', 0)
+                            class_name = detection.get('class', 'Unknown')
+                            st.write(f"- {class_name} ({confidence:.2f})")
+                
+                # Save detections if enabled
+                if save_detections and detections:
+                    st.session_state.interpreter.save_detection(annotated_frame, detections)
+            
+        except Exception as e:
+            st.error(f"Processing error: {e}")
+            release_interpreter()
 
 def main():
     """Main Streamlit application"""
@@ -37,11 +207,7 @@ def main():
         st.header("Configuration")
         
         # Video source selection
-        source_options = {
-            "Webcam": "0",
-            "File Upload": "upload",
-            "RTSP Stream": "rtsp"
-        }
+        source_options = get_source_options()
         source_type = st.selectbox("Video Source", list(source_options.keys()))
         
         if source_type == "File Upload":
@@ -54,12 +220,15 @@ def main():
             source = "0"
         
         # Model selection
-        model_options = ["coco", "yolo", "ocr"]
-        selected_model = st.selectbox("AI Model", model_options)
+        selected_model = st.selectbox("AI Model", get_model_options())
         
         # Confidence threshold
         confidence = st.slider("Confidence Threshold", 0.0, 1.0, 0.5, 0.1)
         
+        # Frame sampling
+        sample_every = st.slider("Process every Nth frame", 1, 10,
+                                 int(os.getenv('FRAME_SAMPLE_EVERY', '1')))
+        
         # Additional options
         save_detections = st.checkbox("Save Detections", value=False)
         show_fps = st.checkbox("Show FPS", value=True)
@@ -68,111 +237,36 @@ def main():
         start_button = st.button("Start Processing", type="primary")
         stop_button = st.button("Stop Processing")
     
-    # Main content area
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        st.header("Live Video Stream")
-        
-        # Video display placeholder
-        video_placeholder = st.empty()
-        
-        # Detection results placeholder
-        results_placeholder = st.empty()
-    
-    with col2:
-        st.header("Detection Results")
-        
-        # Statistics
-        stats_placeholder = st.empty()
-        
-        # Recent detections
-        detections_placeholder = st.empty()
-    
     # Initialize video interpreter
     if 'interpreter' not in st.session_state:
         st.session_state.interpreter = None
         st.session_state.is_running = False
-        st.session_state.detection_history = []
+        st.session_state.detection_history = deque(maxlen=HISTORY_SIZE)
+        st.session_state.class_counts = Counter()
     
     # Handle start/stop
     if start_button and not st.session_state.is_running:
         try:
-            st.session_state.interpreter = VideoInterpreter(
-                source=source,
-                model=selected_model,
-                confidence_threshold=confidence,
-                output_dir="./output"
-            )
+            st.session_state.interpreter = create_interpreter(source, selected_model,
+                                                              confidence, sample_every)
+            st.session_state.interpreter.start_capture()
             st.session_state.is_running = True
             st.success("Video processing started!")
         except Exception as e:
             st.error(f"Failed to start processing: {e}")
+            release_interpreter()
     
     if stop_button and st.session_state.is_running:
-        if st.session_state.interpreter:
-            st.session_state.interpreter.stop()
-        st.session_state.is_running = False
+        release_interpreter()
         st.success("Video processing stopped!")
     
-    # Main processing loop
-    if st.session_state.is_running and st.session_state.interpreter:
-        try:
-            # Read frame
-            ret, frame = st.session_state.interpreter.video_source.read()
-            
-            if ret:
-                # Process frame
-                annotated_frame, detections = st.session_state.interpreter.process_frame(frame)
-                
-                # Convert BGR to RGB for display
-                rgb_frame = cv2.cvtColor(annotated_frame, cv2.COLOR_BGR2RGB)
-                
-                # Display video
-                video_placeholder.image(rgb_frame, channels="RGB", use_column_width=True)
-                
-                # Update detection results
-                if detections and 'predictions' in detections:
-                    st.session_state.detection_history.extend(detections['predictions'])
-                    
-                    # Keep only recent detections
-                    if len(st.session_state.detection_history) > 50:
-                        st.session_state.detection_history = st.session_state.detection_history[-50:]
-                    
-                    # Display statistics
-                    with stats_placeholder.container():
-                        st.metric("Total Detections", len(st.session_state.detection_history))
-                        st.metric("Current FPS", f"{st.session_state.interpreter.fps:.1f}")
-                        
-                        # Class distribution
-                        if st.session_state.detection_history:
-                            class_counts = {}
-                            for detection in st.session_state.detection_history:
-                                class_name = detection.get('class', 'Unknown')
-                                class_counts[class_name] = class_counts.get(class_name, 0) + 1
-                            
-                            st.write("**Class Distribution:**")
-                            for class_name, count in class_counts.items():
-                                st.write(f"- {class_name}: {count}")
-                    
-                    # Display recent detections
-                    with detections_placeholder.container():
-                        st.write("**Recent Detections:**")
-                        for detection in st.session_state.detection_history[-10:]:
-                            confidence = detection.get('confidence', 0)
-                            class_name = detection.get('class', 'Unknown')
-                            st.write(f"- {class_name} ({confidence:.2f})")
-                
-                # Save detections if enabled
-                if save_detections and detections:
-                    st.session_state.interpreter.save_detection(annotated_frame, detections)
-            
-            # Small delay to prevent overwhelming
-            time.sleep(0.03)
-            
-        except Exception as e:
-            st.error(f"Processing error: {e}")
-            st.session_state.is_running = False
+    # Apply slider changes to a running capture; the model manager is this session's own
+    if st.session_state.interpreter is not None:
+        st.session_state.interpreter.video_source.vid_stride = sample_every
+        st.session_state.interpreter.confidence_threshold = confidence
+        st.session_state.interpreter.model_manager.confidence_threshold = confidence
+    
+    render_stream(save_detections)
     
     # Instructions
     if not st.session_state.is_running:
@@ -0,0 +1,56 @@
+"""
+Tests for the box rasteriser in utils.video_utils
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from utils.video_utils import FrameProcessor, _cap_stencil, _fill_box_edges
+
+COLOR = (0, 255, 0)
+
+
+def _reference(shape, boxes, thickness):
+    frame = np.zeros(shape, dtype=np.uint8)
+    for x1, y1, x2, y2 in boxes.tolist():
+        cv2.rectangle(frame, (x1, y1), (x2, y2), COLOR, thickness)
+    return frame
+
+
+def _filled(shape, boxes, thickness):
+    frame = np.zeros(shape, dtype=np.uint8)
+    _fill_box_edges(frame, boxes, np.array(COLOR, dtype=np.uint8), _cap_stencil(thickness))
+    return frame
+
+
+@pytest.mark.parametrize("thickness", range(1, 9))
+def test_fill_box_edges_matches_cv2_rectangle(thickness):
+    rng = np.random.default_rng(thickness)
+    for _ in range(200):
+        # Corners range past every edge of the frame to cover clipping
+        boxes = rng.integers(-20, 100, size=(3, 4)).astype(np.int32)
+        np.testing.assert_array_equal(_filled((60, 80, 3), boxes, thickness),
+                                      _reference((60, 80, 3), boxes, thickness))
+
+
+@pytest.mark.parametrize("thickness", [1, 2, 3, 5])
+@pytest.mark.parametrize("box", [
+    (10, 10, 10, 10),   # single point
+    (10, 10, 30, 10),   # zero height
+    (10, 10, 10, 30),   # zero width
+    (30, 30, 10, 10),   # corners given in reverse
+    (-5, -5, 85, 65),   # outline entirely outside the frame
+    (100, 100, 120, 120),
+])
+def test_fill_box_edges_degenerate_boxes(thickness, box):
+    boxes = np.array([box], dtype=np.int32)
+    np.testing.assert_array_equal(_filled((60, 80, 3), boxes, thickness),
+                                  _reference((60, 80, 3), boxes, thickness))
+
+
+@pytest.mark.parametrize("thickness", [1, 2, 3])
+def test_draw_boxes_matches_cv2_rectangle(thickness):
+    boxes = np.array([[5, 5, 40, 30], [20, 15, 70, 55], [-10, 50, 15, 70]], dtype=np.int32)
+    frame = FrameProcessor.draw_boxes(np.zeros((60, 80, 3), dtype=np.uint8), boxes, COLOR, thickness)
+    np.testing.assert_array_equal(frame, _reference((60, 80, 3), boxes, thickness))
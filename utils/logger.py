@@ -5,10 +5,15 @@ Logging utilities for AI Video Stream Interpreter
 import logging
 import os
 from pathlib import Path
+from typing import Dict
+
+# Loggers already configured by setup_logger, keyed by name
+_loggers: Dict[str, logging.Logger] = {}
 
 def setup_logger(name: str = "video_interpreter", level: str = None) -> logging.Logger:
     """
-    Setup and configure logger
+    Setup and configure logger; later calls with the same name return the same
+    logger without reopening its log file
     
     Args:
         name: Logger name
@@ -21,11 +26,25 @@ def setup_logger(name: str = "video_interpreter", level: str = None) -> logging.
     if level is None:
         level = os.getenv('LOG_LEVEL', 'INFO').upper()
     
+    # Reuse an already configured logger, only applying the level
+    if name in _loggers:
+        logger = _loggers[name]
+        logger.setLevel(getattr(logging, level))
+        for handler in logger.handlers:
+            handler.setLevel(getattr(logging, level))
+        
+        # The output directory may have been created since the first call
+        if not any(isinstance(h, logging.FileHandler) for h in logger.handlers):
+            _add_file_handler(logger, level, logger.handlers[0].formatter if logger.handlers else None)
+        return logger
+    
     # Create logger
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, level))
     
-    # Clear existing handlers to avoid duplicates
+    # Close and clear existing handlers to avoid duplicates and leaked files
+    for handler in logger.handlers:
+        handler.close()
     logger.handlers.clear()
     
     # Create console handler
@@ -43,12 +62,17 @@ def setup_logger(name: str = "video_interpreter", level: str = None) -> logging.
     logger.addHandler(console_handler)
     
     # Create file handler if output directory exists
+    _add_file_handler(logger, level, formatter)
+    
+    _loggers[name] = logger
+    return logger
+
+def _add_file_handler(logger: logging.Logger, level: str, formatter: logging.Formatter):
+    """Attach the log file handler, if the output directory exists"""
     output_dir = Path(os.getenv('OUTPUT_DIR', './output'))
     if output_dir.exists():
         log_file = output_dir / 'video_interpreter.log'
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(getattr(logging, level))
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
-    return logger 
\ No newline at end of file
+        logger.addHandler(file_handler) 
\ No newline at end of file
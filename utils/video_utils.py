@@ -4,22 +4,58 @@ Video utilities for AI Video Stream Interpreter
 
 import cv2
 import numpy as np
+import os
+import sys
+import queue
+import threading
+import functools
 from typing import Tuple, Optional, Union
 from pathlib import Path
 import logging
 
+try:
+    from turbojpeg import TurboJPEG
+except ImportError:
+    TurboJPEG = None
+
+# URL schemes of network streams, which are read live like webcams
+LIVE_SCHEMES = ('rtsp://', 'rtmp://', 'http://', 'https://', 'udp://', 'tcp://')
+
+# FFmpeg options for RTSP sources, unless OPENCV_FFMPEG_CAPTURE_OPTIONS is already set
+RTSP_CAPTURE_OPTIONS = 'rtsp_transport;tcp|buffer_size;1024000'
+
 class VideoSource:
     """Handles different video sources (webcam, file, RTSP)"""
     
-    def __init__(self, source: Union[str, int]):
+    def __init__(self, source: Union[str, int], vid_stride: Optional[int] = None,
+                 resolution: Optional[Tuple[int, int]] = None,
+                 fps: Optional[int] = None,
+                 fourcc: Optional[str] = None):
         """
         Initialize video source
         
         Args:
             source: Video source (webcam index, file path, or RTSP URL)
+            vid_stride: Return every Nth frame, skipping the rest without decoding
+                (defaults to FRAME_SAMPLE_EVERY)
+            resolution: Capture (width, height) requested from the driver
+                (defaults to RESOLUTION_WIDTH x RESOLUTION_HEIGHT, 640x480)
+            fps: Capture frame rate (defaults to FRAME_RATE, 30)
+            fourcc: Webcam pixel format, e.g. "MJPG" or "YUYV"; empty keeps the driver
+                default (defaults to CAPTURE_FOURCC, MJPG)
         """
         self.source = source
+        if vid_stride is None:
+            vid_stride = int(os.getenv('FRAME_SAMPLE_EVERY', '1'))
+        self.vid_stride = max(1, vid_stride)
+        if resolution is None:
+            resolution = (int(os.getenv('RESOLUTION_WIDTH', '640')),
+                          int(os.getenv('RESOLUTION_HEIGHT', '480')))
+        self.resolution = resolution
+        self.fps = fps if fps is not None else int(os.getenv('FRAME_RATE', '30'))
+        self.fourcc = fourcc if fourcc is not None else os.getenv('CAPTURE_FOURCC', 'MJPG')
         self.cap = None
+        self.is_live = False
         self.logger = logging.getLogger(__name__)
         
         self._init_capture()
@@ -27,19 +63,45 @@ class VideoSource:
     def _init_capture(self):
         """Initialize video capture"""
         try:
-            # Try to convert to int for webcam
-            if isinstance(self.source, str) and self.source.isdigit():
-                self.cap = cv2.VideoCapture(int(self.source))
+            # Resolve webcam indices once; everything else is a path or URL
+            source = self.source
+            if isinstance(source, str) and source.lstrip('-').isdigit():
+                source = int(source)
+            is_webcam = isinstance(source, int)
+            
+            # Live feeds keep producing frames whether or not they are consumed
+            self.is_live = is_webcam or str(source).lower().startswith(LIVE_SCHEMES)
+            
+            # Name the backend so OpenCV does not probe each one in turn
+            if is_webcam:
+                backend = cv2.CAP_V4L2 if sys.platform.startswith('linux') else cv2.CAP_ANY
             else:
-                self.cap = cv2.VideoCapture(self.source)
+                backend = cv2.CAP_FFMPEG
+                if str(source).lower().startswith('rtsp://'):
+                    # TCP avoids UDP packet loss smearing frames; a larger socket
+                    # buffer absorbs bursts without re-buffering
+                    os.environ.setdefault('OPENCV_FFMPEG_CAPTURE_OPTIONS',
+                                          RTSP_CAPTURE_OPTIONS)
+            
+            self.cap = cv2.VideoCapture(source, backend)
+            if not self.cap.isOpened() and backend != cv2.CAP_ANY:
+                # OpenCV builds without this backend can still open it another way
+                self.cap = cv2.VideoCapture(source)
             
             if not self.cap.isOpened():
                 raise ValueError(f"Failed to open video source: {self.source}")
             
+            # USB webcams default to uncompressed YUYV, which USB 2.0 cannot carry at
+            # 640x480@30; MJPG is compressed on the camera. Set it before the size,
+            # since drivers pick the available sizes per format
+            if is_webcam and self.fourcc:
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+            
             # Set properties
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.cap.set(cv2.CAP_PROP_FPS, 30)
+            width, height = self.resolution
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.cap.set(cv2.CAP_PROP_FPS, self.fps)
             
             self.logger.info(f"Video source initialized: {self.source}")
             
@@ -47,16 +109,26 @@ class VideoSource:
             self.logger.error(f"Failed to initialize video source: {e}")
             raise
     
-    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+    def read(self, sample_every: Optional[int] = None) -> Tuple[bool, Optional[np.ndarray]]:
         """
         Read a frame from the video source
         
+        Args:
+            sample_every: Return every Nth frame (defaults to vid_stride)
+        
         Returns:
             Tuple of (success, frame)
         """
         if self.cap is None:
             return False, None
         
+        if sample_every is None:
+            sample_every = self.vid_stride
+        
+        # Drop skipped frames with grab(), which does not decode them
+        for _ in range(sample_every - 1):
+            self.cap.grab()
+        
         ret, frame = self.cap.read()
         return ret, frame
     
@@ -82,6 +154,147 @@ class VideoSource:
             self.cap.release()
             self.cap = None
 
+class CaptureThread(threading.Thread):
+    """Reads frames from a VideoSource in the background, keeping only the newest"""
+    
+    def __init__(self, video_source: VideoSource, maxsize: int = 2):
+        """
+        Initialize capture thread
+        
+        Args:
+            video_source: Video source to read from
+            maxsize: Number of frames to buffer; older frames are dropped
+        """
+        super().__init__(name="capture", daemon=True)
+        self.video_source = video_source
+        self.q = queue.Queue(maxsize=maxsize)
+        self.stop_event = threading.Event()
+        self.logger = logging.getLogger(__name__)
+    
+    def run(self):
+        """Capture loop"""
+        while not self.stop_event.is_set():
+            ret, frame = self.video_source.read()
+            if not ret:
+                # Avoid spinning on a closed or stalled source
+                self.stop_event.wait(0.01)
+                continue
+            
+            # Drop the oldest frame rather than block the camera
+            if self.q.full():
+                try:
+                    self.q.get_nowait()
+                except queue.Empty:
+                    pass
+            self.q.put_nowait(frame)
+    
+    def latest(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        Get the newest captured frame, discarding older ones
+        
+        Args:
+            timeout: Seconds to wait for a frame
+            
+        Returns:
+            Frame, or None if none arrived in time
+        """
+        try:
+            frame = self.q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        
+        while True:
+            try:
+                frame = self.q.get_nowait()
+            except queue.Empty:
+                return frame
+    
+    def stop(self, timeout: float = 1.0):
+        """Stop capturing and wait for the thread to exit"""
+        self.stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+@functools.lru_cache(maxsize=None)
+def _cap_stencil(thickness: int) -> np.ndarray:
+    """
+    Round line cap cv2 draws at a given thickness, as a (2 * reach + 1) square mask
+    
+    cv2.rectangle draws its edges as thick lines with these caps, so the box
+    corners are rounded rather than square. Rasterising a zero-length line with
+    OpenCV itself keeps the mask identical to what it would draw.
+    """
+    centre = thickness + 1
+    canvas = np.zeros((2 * centre + 1, 2 * centre + 1), dtype=np.uint8)
+    cv2.line(canvas, (centre, centre), (centre, centre), 255, thickness)
+    reach = centre - int(np.flatnonzero(canvas[:, centre])[0])
+    return canvas[centre - reach:centre + reach + 1, centre - reach:centre + reach + 1] > 0
+
+def _fill_box_edges(frame: np.ndarray, boxes: np.ndarray, color: np.ndarray, cap: np.ndarray):
+    """Paint the edges of axis-aligned (x1, y1, x2, y2) boxes into an HxWxC frame, clipped to it"""
+    height, width = frame.shape[0], frame.shape[1]
+    channels = frame.shape[2]
+    reach = cap.shape[0] // 2
+    
+    for i in range(boxes.shape[0]):
+        x1, y1 = min(boxes[i, 0], boxes[i, 2]), min(boxes[i, 1], boxes[i, 3])
+        x2, y2 = max(boxes[i, 0], boxes[i, 2]), max(boxes[i, 1], boxes[i, 3])
+        left, right = max(x1 - reach, 0), min(x2 + reach + 1, width)
+        top, bottom = max(y1 - reach, 0), min(y2 + reach + 1, height)
+        if left >= right or top >= bottom:
+            continue
+        
+        # Straight runs are bands reaching `reach` pixels either side of the outline
+        for y in range(top, bottom):
+            if y <= y1 + reach or y >= y2 - reach:
+                for x in range(max(x1, 0), min(x2 + 1, width)):
+                    for c in range(channels):
+                        frame[y, x, c] = color[c]
+        for y in range(max(y1, 0), min(y2 + 1, height)):
+            for x in range(left, right):
+                if x <= x1 + reach or x >= x2 - reach:
+                    for c in range(channels):
+                        frame[y, x, c] = color[c]
+        
+        # Round caps at the corners
+        for k in range(4):
+            cx = x1 if k % 2 == 0 else x2
+            cy = y1 if k < 2 else y2
+            for dy in range(-reach, reach + 1):
+                y = cy + dy
+                if y < 0 or y >= height:
+                    continue
+                for dx in range(-reach, reach + 1):
+                    x = cx + dx
+                    if 0 <= x < width and cap[dy + reach, dx + reach]:
+                        for c in range(channels):
+                            frame[y, x, c] = color[c]
+
+@functools.lru_cache(maxsize=1)
+def get_box_kernel():
+    """
+    _fill_box_edges compiled with numba, or None if numba is missing
+    
+    Imported on first use so that loading this module, and startup with it,
+    does not pull in numba and llvmlite.
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    return njit(cache=True)(_fill_box_edges)
+
+@functools.lru_cache(maxsize=1)
+def get_turbojpeg():
+    """Shared libjpeg-turbo encoder, or None if PyTurboJPEG or libturbojpeg is missing"""
+    if TurboJPEG is None:
+        return None
+    try:
+        return TurboJPEG()
+    except Exception:
+        # The Python package is present but the shared library is not
+        return None
+
 class FrameProcessor:
     """Utility class for frame processing operations"""
     
@@ -105,6 +318,21 @@ class FrameProcessor:
         """Convert RGB frame to BGR"""
         return cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
     
+    @staticmethod
+    def encode_jpeg(frame: np.ndarray, quality: int = 80) -> Optional[bytes]:
+        """
+        Encode a BGR frame as JPEG bytes
+        
+        Uses libjpeg-turbo when installed, which returns bytes directly; otherwise
+        falls back to cv2.imencode. Returns None if encoding fails.
+        """
+        tj = get_turbojpeg()
+        if tj is not None:
+            return tj.encode(frame, quality=quality)
+        
+        ok, buffer = cv2.imencode('.jpg', frame, (cv2.IMWRITE_JPEG_QUALITY, quality))
+        return buffer.tobytes() if ok else None
+    
     @staticmethod
     def apply_blur(frame: np.ndarray, kernel_size: int = 5) -> np.ndarray:
         """Apply Gaussian blur to frame"""
@@ -124,6 +352,31 @@ class FrameProcessor:
                    font_scale, color, thickness)
         return frame
     
+    @staticmethod
+    def draw_boxes(frame: np.ndarray, boxes: np.ndarray,
+                   color: Tuple[int, int, int] = (0, 255, 0),
+                   thickness: int = 2) -> np.ndarray:
+        """
+        Draw many rectangles on frame in one call
+        
+        Args:
+            frame: HxWx3 uint8 frame, drawn on in place
+            boxes: Nx4 int32 array of (x1, y1, x2, y2) pixel corners
+            color: Box colour
+            thickness: Line thickness in pixels
+            
+        With numba installed the boxes are rasterised in one compiled loop that
+        reproduces cv2.rectangle pixel for pixel, otherwise each is drawn with it.
+        """
+        kernel = get_box_kernel() if frame.dtype == np.uint8 and frame.ndim == 3 else None
+        if kernel is not None:
+            kernel(frame, np.ascontiguousarray(boxes, dtype=np.int32),
+                            np.array(color, dtype=np.uint8), _cap_stencil(thickness))
+        else:
+            for x1, y1, x2, y2 in boxes.tolist():
+                cv2.rectangle(frame, (x1, y1), (x2, y2), color, thickness)
+        return frame
+    
     @staticmethod
     def draw_rectangle(frame: np.ndarray, x1: int, y1: int, x2: int, y2: int,
                        color: Tuple[int, int, int] = (0, 255, 0), 
@@ -7,14 +7,60 @@ import cv2
 import numpy as np
 import time
 import os
-from typing import Optional, Dict, Any, Tuple
+import queue
+import json
+import asyncio
+import itertools
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple
 from pathlib import Path
 import logging
 
-from roboflow import Roboflow
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from utils.logger import setup_logger
-from utils.video_utils import VideoSource, FrameProcessor
-from models.model_manager import ModelManager
+from utils.video_utils import VideoSource, CaptureThread, FrameProcessor
+
+# roboflow and the model backends are imported when first needed, keeping them
+# off the import path of callers that never use them
+if TYPE_CHECKING:
+    from models.model_manager import ModelManager
+
+# Seconds to wait for a partial batch to fill before running it anyway
+BATCH_TIMEOUT = 0.1
+
+# Frames buffered between pipeline stages
+PIPELINE_QUEUE_SIZE = 2
+
+# Seconds a pipeline stage blocks on a queue before rechecking is_running
+PIPELINE_TIMEOUT = 0.1
+
+# Annotation colour (BGR) and font; labels are drawn 10px above their box, so
+# boxes starting higher than LABEL_MIN_Y are drawn without one
+BOX_COLOR = (0, 255, 0)
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_MIN_Y = 12
+
+# Saved detection frames and the metadata log they are indexed in
+DETECTION_JPEG_PARAMS = (cv2.IMWRITE_JPEG_QUALITY, 85)
+DETECTION_LOG = "detections.jsonl"
+DETECTION_LOG_BUFFER = 1 << 20
+
+# Batches sent to a remote model at once before process_frame waits for replies
+MAX_INFLIGHT_BATCHES = 4
+
+# Frames awaiting an async remote prediction at once in run()
+MAX_INFLIGHT_REQUESTS = 4
+
+def _json_default(value):
+    """Serialise NumPy scalars and arrays from model outputs for the stdlib json module"""
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
 
 class VideoInterpreter:
     """Main class for AI video stream interpretation"""
@@ -23,7 +69,12 @@ class VideoInterpreter:
                  source: str = "0",
                  model: str = "coco",
                  confidence_threshold: float = 0.5,
-                 output_dir: str = "./output"):
+                 output_dir: str = "./output",
+                 batch_size: int = 1,
+                 device: Optional[str] = None,
+                 half: bool = True,
+                 vid_stride: Optional[int] = None,
+                 model_manager: Optional["ModelManager"] = None):
         """
         Initialize the video interpreter
         
@@ -32,10 +83,21 @@ class VideoInterpreter:
             model: Model name to use for inference
             confidence_threshold: Minimum confidence for detections
             output_dir: Directory to save detection results
+            batch_size: Number of frames to run through the model at once
+            device: Inference device ("0", "cuda:0", "cpu"); defaults to the first GPU if present
+            half: Use FP16 inference on GPU
+            vid_stride: Process every Nth frame so slow models keep up with live feeds
+                (defaults to FRAME_SAMPLE_EVERY)
+            model_manager: Already loaded ModelManager to use instead of creating one
+                (model, confidence_threshold, device and half then only describe it)
         """
         self.source = source
         self.model = model
         self.confidence_threshold = confidence_threshold
+        self.batch_size = max(1, batch_size)
+        self.device = device
+        self.half = half
+        self.vid_stride = vid_stride
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         
@@ -43,9 +105,28 @@ class VideoInterpreter:
         self.logger = setup_logger()
         
         # Initialize components
-        self._init_roboflow()
+        if model_manager is not None:
+            self.model_manager = model_manager
+            self.rf = model_manager.rf
+        else:
+            self._init_roboflow()
         self._init_video_source()
-        self._init_model_manager()
+        if model_manager is None:
+            self._init_model_manager()
+        
+        # Compile for this source's frame size now rather than on its first frame
+        self.model_manager.warmup(self.video_source.get_frame_size())
+        
+        # Background capture for callers that poll frames (web interface)
+        self.capture = None
+        
+        # Detection metadata log, opened on the first saved detection
+        self._det_log = None
+        
+        # Saved frames are numbered within a run; the run's start time keeps
+        # names unique across runs sharing an output directory
+        self._save_seq = itertools.count()
+        self._run_started = int(time.time())
         
         # Processing state
         self.is_running = False
@@ -53,6 +134,14 @@ class VideoInterpreter:
         self.fps = 0
         self.last_fps_time = time.time()
         
+        # Remote inference state: frames waiting for a full batch, batches awaiting
+        # a reply, and the newest finished frame (index, annotated_frame)
+        self._pending = deque()
+        self._inflight: List[Future] = []
+        self._executor = None
+        self._frame_index = 0
+        self._latest = None
+        
     def _init_roboflow(self):
         """Initialize Roboflow client"""
         try:
@@ -61,6 +150,7 @@ class VideoInterpreter:
                 self.logger.warning("ROBOFLOW_API_KEY not found. Some features may be limited.")
                 self.rf = None
             else:
+                from roboflow import Roboflow
                 self.rf = Roboflow(api_key=api_key)
                 self.logger.info("Roboflow client initialized successfully")
         except Exception as e:
@@ -70,7 +160,7 @@ class VideoInterpreter:
     def _init_video_source(self):
         """Initialize video source"""
         try:
-            self.video_source = VideoSource(self.source)
+            self.video_source = VideoSource(self.source, vid_stride=self.vid_stride)
             self.logger.info(f"Video source initialized: {self.source}")
         except Exception as e:
             self.logger.error(f"Failed to initialize video source: {e}")
@@ -79,10 +169,13 @@ class VideoInterpreter:
     def _init_model_manager(self):
         """Initialize model manager"""
         try:
+            from models.model_manager import ModelManager
             self.model_manager = ModelManager(
                 model_name=self.model,
                 confidence_threshold=self.confidence_threshold,
-                roboflow_client=self.rf
+                roboflow_client=self.rf,
+                device=self.device,
+                half=self.half
             )
             self.logger.info(f"Model manager initialized with model: {self.model}")
         except Exception as e:
@@ -98,7 +191,14 @@ class VideoInterpreter:
             
         Returns:
             Tuple of (annotated_frame, detection_results)
+            
+        For remote models with batch_size > 1 frames are sent in batches without
+        waiting for the reply, so the result is the newest frame that has come back
+        (with its own detections), not necessarily the one passed in.
         """
+        if self._batches_remote():
+            return self._process_frame_remote(frame)
+        
         try:
             # Run inference
             detections = self.model_manager.predict(frame)
@@ -115,37 +215,140 @@ class VideoInterpreter:
             self.logger.error(f"Error processing frame: {e}")
             return frame, {}
     
+    def process_batch(self, frames: List[np.ndarray]) -> List[Tuple[np.ndarray, Dict[str, Any]]]:
+        """
+        Process several frames with a single batched inference call
+        
+        Args:
+            frames: Input frames as numpy arrays
+            
+        Returns:
+            List of (annotated_frame, detection_results) tuples, one per frame
+        """
+        try:
+            # Run inference
+            detections_list = self.model_manager.predict_batch(frames)
+            
+            results = []
+            for frame, detections in zip(frames, detections_list):
+                results.append((self._annotate_frame(frame, detections), detections))
+                self._update_fps()
+            
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"Error processing batch: {e}")
+            return [(frame, {}) for frame in frames]
+    
+    def process_frame_async(self, frame: np.ndarray) -> "asyncio.Task":
+        """
+        Start processing a frame on the running event loop
+        
+        Args:
+            frame: Input frame as numpy array
+            
+        Returns:
+            Task resolving to (annotated_frame, detection_results)
+        """
+        return asyncio.ensure_future(self._process_frame_async(frame))
+    
+    async def _process_frame_async(self, frame: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Await a prediction for a frame, then annotate it"""
+        try:
+            detections = await self.model_manager.predict_async(frame)
+            annotated_frame = self._annotate_frame(frame, detections)
+            self._update_fps()
+            return annotated_frame, detections
+            
+        except Exception as e:
+            self.logger.error(f"Error processing frame: {e}")
+            return frame, {}
+    
+    def _batches_remote(self) -> bool:
+        """Whether process_frame pipelines batches to a remote model"""
+        return self.batch_size > 1 and self.model_manager.is_remote
+    
+    def _process_frame_remote(self, frame: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Queue a frame for batched remote inference and return the newest finished frame"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=MAX_INFLIGHT_BATCHES,
+                                                thread_name_prefix="inference")
+        
+        self._pending.append((self._frame_index, frame))
+        self._frame_index += 1
+        
+        if len(self._pending) >= self.batch_size:
+            # Bound the backlog by waiting for the oldest request
+            if len(self._inflight) >= MAX_INFLIGHT_BATCHES:
+                self._inflight[0].result()
+            
+            batch = list(self._pending)
+            self._pending.clear()
+            self._inflight.append(self._executor.submit(self._infer_batch, batch))
+        
+        newest = None
+        for future in [f for f in self._inflight if f.done()]:
+            self._inflight.remove(future)
+            for index, annotated_frame, detections in future.result():
+                self._update_fps()
+                if newest is None or index > newest[0]:
+                    newest = (index, annotated_frame, detections)
+        
+        if newest is not None and (self._latest is None or newest[0] > self._latest[0]):
+            self._latest = newest[:2]
+            return newest[1], newest[2]
+        
+        # Nothing new has come back; repeat the last frame without re-reporting it
+        if self._latest is not None:
+            return self._latest[1], {}
+        return frame, {}
+    
+    def _infer_batch(self, batch: List[Tuple[int, np.ndarray]]) -> List[Tuple[int, np.ndarray, Dict[str, Any]]]:
+        """Run one batched prediction, keeping each result paired with its frame index"""
+        frames = [frame for _, frame in batch]
+        try:
+            detections_list = self.model_manager.predict_batch(frames)
+            return [(index, self._annotate_frame(frame, detections), detections)
+                    for (index, frame), detections in zip(batch, detections_list)]
+        except Exception as e:
+            # Pass the batch through unannotated, as process_frame does for one frame
+            self.logger.error(f"Error processing batch: {e}")
+            return [(index, frame, {}) for index, frame in batch]
+    
     def _annotate_frame(self, frame: np.ndarray, detections: Dict[str, Any]) -> np.ndarray:
-        """Annotate frame with detection results"""
-        annotated_frame = frame.copy()
-        
-        if 'predictions' in detections:
-            for prediction in detections['predictions']:
-                if prediction.get('confidence', 0) >= self.confidence_threshold:
-                    # Extract bounding box
-                    x = prediction.get('x', 0)
-                    y = prediction.get('y', 0)
-                    width = prediction.get('width', 0)
-                    height = prediction.get('height', 0)
-                    
-                    # Convert to pixel coordinates
-                    img_height, img_width = frame.shape[:2]
-                    x1 = int((x - width/2) * img_width)
-                    y1 = int((y - height/2) * img_height)
-                    x2 = int((x + width/2) * img_width)
-                    y2 = int((y + height/2) * img_height)
-                    
-                    # Draw bounding box
-                    cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    
-                    # Add label
-                    label = f"{prediction.get('class', 'Unknown')} {prediction.get('confidence', 0):.2f}"
-                    cv2.putText(annotated_frame, label, (x1, y1-10), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        """Annotate frame with detection results, drawing in place on the frame"""
+        annotated_frame = frame
+        
+        predictions = detections.get('predictions')
+        if predictions:
+            # Box geometry for all predictions at once: x, y, width, height, confidence
+            boxes = np.array([[p.get('x', 0), p.get('y', 0), p.get('width', 0),
+                               p.get('height', 0), p.get('confidence', 0)]
+                              for p in predictions], dtype=np.float32)
+            keep = np.flatnonzero(boxes[:, 4] >= self.confidence_threshold)
+            
+            # Convert centre/size to pixel corner coordinates
+            img_height, img_width = frame.shape[:2]
+            centres, halves = boxes[keep, :2], boxes[keep, 2:4] / 2
+            scale = np.array([img_width, img_height], dtype=np.float32)
+            corners = (np.hstack((centres - halves, centres + halves)) * np.tile(scale, 2)).astype(np.int32)
+            
+            confidences = boxes[keep, 4].tolist()
+            
+            # Draw bounding boxes in one pass
+            FrameProcessor.draw_boxes(annotated_frame, corners, BOX_COLOR, 2)
+            
+            for i, (x1, y1, x2, y2), confidence in zip(keep.tolist(), corners.tolist(), confidences):
+                # Add label, unless it would sit above the top of the frame
+                if y1 < LABEL_MIN_Y:
+                    continue
+                label = f"{predictions[i].get('class', 'Unknown')} {confidence:.2f}"
+                cv2.putText(annotated_frame, label, (x1, y1-10), 
+                           LABEL_FONT, 0.5, BOX_COLOR, 2)
         
         # Add FPS counter
         cv2.putText(annotated_frame, f"FPS: {self.fps:.1f}", (10, 30), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                   LABEL_FONT, 1, BOX_COLOR, 2)
         
         return annotated_frame
     
@@ -160,52 +363,57 @@ class VideoInterpreter:
             self.last_fps_time = current_time
     
     def save_detection(self, frame: np.ndarray, detections: Dict[str, Any]):
-        """Save detection results to output directory"""
+        """Save the frame and append its detections to the output directory's JSONL log"""
         if not detections:
             return
             
-        timestamp = int(time.time())
-        frame_path = self.output_dir / f"detection_{timestamp}.jpg"
-        cv2.imwrite(str(frame_path), frame)
+        frame_name = f"detection_{self._run_started}_{next(self._save_seq):08d}.jpg"
+        cv2.imwrite(str(self.output_dir / frame_name), frame, DETECTION_JPEG_PARAMS)
         
-        # Save detection metadata
-        metadata_path = self.output_dir / f"detection_{timestamp}.json"
-        import json
-        with open(metadata_path, 'w') as f:
-            json.dump(detections, f, indent=2)
+        # One record per line in a long-lived buffered file instead of a file per detection
+        if self._det_log is None:
+            self._det_log = open(self.output_dir / DETECTION_LOG, 'ab', buffering=DETECTION_LOG_BUFFER)
+        
+        record = {'ts': time.time(), 'frame': frame_name, 'det': detections}
+        if orjson is not None:
+            self._det_log.write(orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            self._det_log.write(json.dumps(record, default=_json_default).encode())
+        self._det_log.write(b'\n')
+    
+    def _close_detection_log(self):
+        """Flush and close the detection log, once nothing can be writing to it"""
+        if self._det_log is not None:
+            self._det_log.close()
+            self._det_log = None
     
     def run(self):
         """Main processing loop"""
         self.is_running = True
         self.logger.info("Starting video stream processing...")
         
+        # capture -> inference -> render, so frame I/O overlaps with inference
+        frames = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        results = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        
         try:
-            while self.is_running:
-                # Read frame
-                ret, frame = self.video_source.read()
-                if not ret:
-                    self.logger.warning("Failed to read frame")
-                    continue
-                
-                # Process frame
-                annotated_frame, detections = self.process_frame(frame)
-                
-                # Save detections if enabled
-                if os.getenv('SAVE_DETECTIONS', 'false').lower() == 'true':
-                    self.save_detection(annotated_frame, detections)
-                
-                # Display frame
-                cv2.imshow('AI Video Stream Interpreter', annotated_frame)
-                
-                # Handle key presses
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q'):
-                    break
-                elif key == ord('s'):
-                    # Save current frame
-                    timestamp = int(time.time())
-                    cv2.imwrite(f"snapshot_{timestamp}.jpg", annotated_frame)
-                    self.logger.info(f"Saved snapshot: snapshot_{timestamp}.jpg")
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix="pipeline") as executor:
+                try:
+                    executor.submit(self._run_stage, self._capture_stage, frames)
+                    executor.submit(self._run_stage, self._inference_stage, frames, results)
+                    
+                    # Render on the main thread, which must own the HighGUI window
+                    while self.is_running:
+                        try:
+                            result = results.get(timeout=PIPELINE_TIMEOUT)
+                        except queue.Empty:
+                            continue
+                        
+                        if not self._handle_result(*result):
+                            break
+                finally:
+                    # Let the worker stages wind down before the executor joins them
+                    self.is_running = False
         
         except KeyboardInterrupt:
             self.logger.info("Processing stopped by user")
@@ -214,9 +422,184 @@ class VideoInterpreter:
         finally:
             self.cleanup()
     
+    def _run_stage(self, stage, *queues):
+        """Run a pipeline stage, stopping the pipeline if it fails"""
+        try:
+            stage(*queues)
+        except Exception as e:
+            self.logger.error(f"Error in {stage.__name__}: {e}")
+            self.is_running = False
+    
+    def _put(self, q: queue.Queue, item) -> bool:
+        """Put an item on a pipeline queue, giving up once processing stops"""
+        while self.is_running:
+            try:
+                q.put(item, timeout=PIPELINE_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _put_latest(self, q: queue.Queue, item):
+        """Put an item on a pipeline queue, dropping the oldest waiting item if it is full"""
+        while True:
+            try:
+                q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+    
+    def _capture_stage(self, frames: queue.Queue):
+        """Read frames from the video source"""
+        while self.is_running:
+            ret, frame = self.video_source.read()
+            if not ret:
+                self.logger.warning("Failed to read frame")
+                continue
+            
+            if self.video_source.is_live:
+                # Keep reading when inference falls behind, so frames are dropped
+                # here instead of going stale in the driver buffer
+                self._put_latest(frames, frame)
+            elif not self._put(frames, frame):
+                break
+    
+    def _inference_stage(self, frames: queue.Queue, results: queue.Queue):
+        """Run inference on captured frames, batching them when enabled"""
+        if self.model_manager.supports_async():
+            asyncio.run(self._inference_stage_async(frames, results))
+            return
+        
+        pending = []
+        batch_started = time.monotonic()
+        
+        # Remote models batch and pipeline inside process_frame
+        batch_size = 1 if self._batches_remote() else self.batch_size
+        
+        while self.is_running:
+            if len(pending) < batch_size:
+                try:
+                    frame = frames.get(timeout=BATCH_TIMEOUT if pending else PIPELINE_TIMEOUT)
+                    if not pending:
+                        batch_started = time.monotonic()
+                    pending.append(frame)
+                except queue.Empty:
+                    pass
+            
+            # Wait for a full batch unless the oldest frame has waited long enough
+            if not pending or (len(pending) < batch_size
+                               and time.monotonic() - batch_started < BATCH_TIMEOUT):
+                continue
+            
+            if len(pending) > 1:
+                outputs = self.process_batch(pending)
+                pending = []
+            else:
+                frame = pending.pop()
+                
+                # Upload the next frame, if one is already waiting, while this one
+                # infers (the letterbox runs here, only the copy overlaps). Live
+                # sources skip this: a frame held back here would miss the newer
+                # ones the capture stage keeps replacing it with
+                if not self.video_source.is_live:
+                    try:
+                        pending.append(frames.get_nowait())
+                        batch_started = time.monotonic()
+                        self.model_manager.prefetch(pending[0])
+                    except queue.Empty:
+                        pass
+                
+                outputs = [self.process_frame(frame)]
+            
+            for output in outputs:
+                if not self._put(results, output):
+                    return
+    
+    def _get_frame(self, frames: queue.Queue) -> Optional[np.ndarray]:
+        """Take a captured frame, or None if none arrives in time"""
+        try:
+            return frames.get(timeout=PIPELINE_TIMEOUT)
+        except queue.Empty:
+            return None
+    
+    async def _inference_stage_async(self, frames: queue.Queue, results: queue.Queue):
+        """Keep several remote predictions in flight, emitting results in capture order"""
+        loop = asyncio.get_running_loop()
+        inflight = {}   # task -> frame index
+        finished = {}   # frame index -> output waiting for earlier frames
+        next_index = emit_index = 0
+        getter = None
+        
+        try:
+            while self.is_running:
+                # Only take another frame while there is room for its request
+                if getter is None and len(inflight) < MAX_INFLIGHT_REQUESTS:
+                    getter = loop.run_in_executor(None, self._get_frame, frames)
+                
+                waiting = set(inflight) | ({getter} if getter is not None else set())
+                done, _ = await asyncio.wait(waiting, timeout=PIPELINE_TIMEOUT,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                
+                for future in done:
+                    if future is getter:
+                        getter = None
+                        frame = future.result()
+                        if frame is not None:
+                            inflight[self.process_frame_async(frame)] = next_index
+                            next_index += 1
+                    else:
+                        finished[inflight.pop(future)] = future.result()
+                
+                while emit_index in finished:
+                    output = finished.pop(emit_index)
+                    emit_index += 1
+                    if not await loop.run_in_executor(None, self._put, results, output):
+                        return
+        finally:
+            for task in inflight:
+                task.cancel()
+            await self.model_manager.close_async()
+    
+    def _handle_result(self, annotated_frame: np.ndarray, detections: Dict[str, Any]) -> bool:
+        """Save and display a processed frame, returning False when the user quits"""
+        # Save detections if enabled
+        if os.getenv('SAVE_DETECTIONS', 'false').lower() == 'true':
+            self.save_detection(annotated_frame, detections)
+        
+        # Display frame
+        cv2.imshow('AI Video Stream Interpreter', annotated_frame)
+        
+        # Handle key presses
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('q'):
+            return False
+        elif key == ord('s'):
+            # Save current frame
+            timestamp = int(time.time())
+            cv2.imwrite(f"snapshot_{timestamp}.jpg", annotated_frame)
+            self.logger.info(f"Saved snapshot: snapshot_{timestamp}.jpg")
+        
+        return True
+    
+    def start_capture(self) -> CaptureThread:
+        """Start reading frames in a background thread, see CaptureThread.latest()"""
+        if self.capture is None or not self.capture.is_alive():
+            self.capture = CaptureThread(self.video_source)
+            self.capture.start()
+        return self.capture
+    
     def cleanup(self):
         """Clean up resources"""
         self.is_running = False
+        if self.capture is not None:
+            self.capture.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._close_detection_log()
         if hasattr(self, 'video_source'):
             self.video_source.release()
         cv2.destroyAllWindows()
@@ -224,4 +607,6 @@ class VideoInterpreter:
     
     def stop(self):
         """Stop the processing loop"""
-        self.is_running = False 
\ No newline at end of file
+        self.is_running = False
+        if self.capture is not None:
+            self.capture.stop() 
\ No newline at end of file